@@ -1,31 +1,100 @@
-import pandas as pd
+import argparse
+import time
+
 import numpy as np
-from datetime import datetime, timedelta
-
-# Generate sample data
-products = ['Milk', 'Bread', 'Eggs', 'Butter', 'Cheese']
-start_date = datetime.now() - timedelta(days=60)
-dates = [start_date + timedelta(days=x) for x in range(60)]
-
-data = []
-for date in dates:
-    for product in products:
-        # Random quantity with some trend
-        base_demand = np.random.randint(10, 50)
-        trend = 0.1 * (date - start_date).days if product == 'Milk' else 0 # Milk has increasing trend
-        quantity = int(base_demand + trend + np.random.normal(0, 5))
-        quantity = max(0, quantity)
-        
-        price = round(np.random.uniform(2.0, 10.0), 2)
-        
-        data.append({
-            'Date': date,
-            'Product': product,
-            'Quantity': quantity,
-            'Price': price,
-            'Revenue': quantity * price
-        })
-
-df = pd.DataFrame(data)
-df.to_excel('sample_sales_data.xlsx', index=False)
-print("Created sample_sales_data.xlsx")
\ No newline at end of file
+import pandas as pd
+
+PRODUCTS = ['Milk', 'Bread', 'Eggs', 'Butter', 'Cheese']
+TREND_PRODUCTS = ('Milk',)  # Products with an upward trend of 0.1 units per day
+EXCEL_MAX_ROWS = 1_048_575  # Data rows that fit on one xlsx sheet under the header
+
+# --- Output Formats ---
+WRITERS = {
+    "xlsx": lambda df, path: df.to_excel(path, index=False),
+    "csv": lambda df, path: df.to_csv(path, index=False),
+    "csv.gz": lambda df, path: df.to_csv(path, index=False, compression="gzip"),
+    "parquet": lambda df, path: df.to_parquet(path, index=False),
+}
+
+
+def product_names(n_products):
+    """PRODUCTS for up to five products, then numbered SKUs"""
+    if n_products <= len(PRODUCTS):
+        return PRODUCTS[:n_products]
+    return [f"SKU-{i:06d}" for i in range(n_products)]
+
+
+def generate_sample_data(products=PRODUCTS, n_days=60, start_date=None, seed=None,
+                         weekly_amplitude=0.0, yearly_amplitude=0.0, trend_products=TREND_PRODUCTS):
+    """
+    Sample sales rows: one row per product per day (date-major), with an upward trend on
+    `trend_products`. Quantities are a random base of 10-49 units, optionally scaled by
+    weekly / yearly seasonality (fractions of the base), plus N(0, 5) noise.
+    Every column is drawn in one vectorized pass, so tens of millions of rows take seconds.
+    `seed` makes the output reproducible; `start_date` defaults to `n_days` ago.
+    """
+    rng = np.random.default_rng(seed)
+    if start_date is None:
+        start_date = pd.Timestamp.now() - pd.Timedelta(days=n_days)
+    dates = pd.date_range(pd.Timestamp(start_date), periods=n_days, freq="D")
+    n_products = len(products)
+    size = n_days * n_products
+
+    day = np.repeat(np.arange(n_days), n_products)
+    product_codes = np.tile(np.arange(n_products), n_days)
+
+    # Random quantity with some trend and seasonality
+    base_demand = rng.integers(10, 50, size).astype(np.float64)
+    season = 1.0
+    if weekly_amplitude:
+        season = season + weekly_amplitude * np.sin(2 * np.pi * np.repeat(dates.dayofweek, n_products) / 7)
+    if yearly_amplitude:
+        season = season + yearly_amplitude * np.sin(2 * np.pi * np.repeat(dates.dayofyear, n_products) / 365.25)
+    has_trend = np.isin(np.asarray(products, dtype=object), list(trend_products))[product_codes]
+    trend = np.where(has_trend, 0.1 * day, 0.0)
+    quantity = np.trunc(base_demand * season + trend + rng.normal(0, 5, size))
+    quantity = np.maximum(quantity, 0).astype(np.int64)
+
+    price = np.round(rng.uniform(2.0, 10.0, size), 2)
+
+    return pd.DataFrame({
+        'Date': np.repeat(dates.values, n_products),
+        'Product': pd.Categorical.from_codes(product_codes, categories=pd.Index(products)),
+        'Quantity': quantity,
+        'Price': price,
+        'Revenue': quantity * price,
+    })
+
+
+def write_sample_data(df, path, fmt):
+    """Write generated rows in one of WRITERS' formats"""
+    if fmt == "xlsx" and len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(df):,} rows do not fit in one xlsx sheet; use csv, csv.gz or parquet.")
+    WRITERS[fmt](df, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sales data for uploads and benchmarks.")
+    parser.add_argument("--products", type=int, default=len(PRODUCTS))
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--start", default=None, help="First date (default: --days ago)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--weekly", type=float, default=0.0, help="Weekly seasonality amplitude, e.g. 0.3")
+    parser.add_argument("--yearly", type=float, default=0.0, help="Yearly seasonality amplitude, e.g. 0.2")
+    parser.add_argument("--format", default="xlsx", choices=list(WRITERS))
+    parser.add_argument("-o", "--output", default=None, help="Output path (default: sample_sales_data.<format>)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = generate_sample_data(product_names(args.products), args.days, args.start, args.seed,
+                              args.weekly, args.yearly)
+    generated = time.perf_counter() - start
+
+    output = args.output or f"sample_sales_data.{args.format}"
+    write_sample_data(df, output, args.format)
+    print(f"Created {output}: {len(df):,} rows "
+          f"(generated in {generated:.2f}s, written in {time.perf_counter() - start - generated:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
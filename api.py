@@ -0,0 +1,149 @@
+"""
+Headless API over a project database: everything the Streamlit pages show,
+callable from scripts, workers and benchmarks without a running server.
+
+    import api
+    api.ingest_bytes("users/me/data.db", "users/me/uploaded_files", "sales.csv", data)
+    api.dashboard("users/me/data.db")["top_products"]
+    api.product_forecast("users/me/data.db", "Milk", forecast_days=14)["growth"]
+    api.portfolio("me")["projects"]
+
+Results are memoized per project data version (see cache.py) and shared with
+the app, so treat returned frames as read-only.
+"""
+import cache
+import forecast_cache
+import ingest
+import queries
+import snapshot
+import timeseries
+from db import db_connection
+from forecasting import MIN_HISTORY_DAYS, MODEL_NAME, MODELS
+from jobs import submit_ingest, get_jobs, ACTIVE_STATUSES
+from portfolio import portfolio
+from uploads import save_upload, save_upload_file, list_uploads, delete_uploads, load_upload
+
+TOP_PRODUCTS = 10
+
+
+# --- Dashboard ---
+def dashboard(db_path, top_n=TOP_PRODUCTS):
+    """
+    Dashboard figures: the dashboard_metrics dict plus `trend` (daily totals) and
+    `top_products` (ascending). Both frames are None when the project has no data.
+    """
+    with db_connection(db_path) as conn:
+        view = dict(cache.memoize(conn, 'dashboard_metrics', queries.dashboard_metrics), trend=None,
+                    top_products=None)
+        if view['active_products'] > 0:
+            matrix = timeseries.load_matrix(conn)
+            view['trend'] = cache.memoize(conn, 'daily_totals', lambda c: timeseries.daily_totals(matrix))
+            view['top_products'] = cache.memoize(conn, 'top_products',
+                                                 lambda c, n: timeseries.top_products(matrix, n), top_n)
+    return view
+
+
+# --- Forecasts ---
+def load_forecasts(db_path, model=MODEL_NAME):
+    """Cached forecasts for every product (see forecast_cache.load_forecasts)"""
+    with db_connection(db_path) as conn:
+        return cache.memoize(conn, 'forecasts', forecast_cache.load_forecasts, model)
+
+
+def forecast_table(db_path, forecast_days, model=MODEL_NAME):
+    """Tidy (product_name, date, predicted_quantity) forecast for every product with enough history"""
+    return forecast_cache.cached_forecast_table(load_forecasts(db_path, model), forecast_days)
+
+
+def forecast_csv(db_path, forecast_days, model=MODEL_NAME):
+    """forecast_table encoded as UTF-8 CSV bytes, built once per (model, forecast_days) and data version"""
+    def encode(conn, model, forecast_days):
+        return forecast_table(db_path, forecast_days, model).to_csv(index=False).encode('utf-8')
+
+    with db_connection(db_path) as conn:
+        return cache.memoize(conn, 'forecast_csv', encode, model, forecast_days)
+
+
+def product_forecast(db_path, product, forecast_days=30, model=MODEL_NAME):
+    """
+    One product's gap-filled `history` and `forecast` (date, predicted_quantity) with
+    the figures the prediction page reports: avg_predicted, current_avg, growth (%)
+    and recommended_stock. `forecast` is None when history is too short.
+    """
+    forecasts = load_forecasts(db_path, model)
+    with db_connection(db_path) as conn:
+        history = timeseries.product_series(timeseries.load_matrix(conn), product)
+    result = {'history': history, 'forecast': None}
+    if forecasts.at[product, 'n_days'] < MIN_HISTORY_DAYS:
+        return result
+
+    forecast = forecast_cache.cached_forecast_table(forecasts.loc[[product]], forecast_days)
+    predicted = forecast['predicted_quantity']
+    current_avg = history['quantity'].mean()
+    result.update(
+        forecast=forecast[['date', 'predicted_quantity']].reset_index(drop=True),
+        avg_predicted=predicted.mean(),
+        current_avg=current_avg,
+        growth=(predicted.mean() - current_avg) / current_avg * 100,
+        recommended_stock=predicted.sum(),
+    )
+    return result
+
+
+# --- Data Loading ---
+def ingest_bytes(db_path, upload_dir, file_name, data, mode="Append", background=False):
+    """
+    Store an uploaded file and load it into the project.
+    Returns (success, message, rows) when run inline, or the job id with background=True.
+    File types no reader handles are refused before anything is stored (in the
+    background, by raising IngestValidationError).
+    """
+    refused = _refuse_unsupported(file_name, background)
+    if refused:
+        return refused
+    return _load_saved(db_path, upload_dir, save_upload(db_path, upload_dir, file_name, data), file_name, mode,
+                       background)
+
+
+def ingest_path(db_path, upload_dir, file_name, path, mode="Append", background=False, sha256=None, move=False):
+    """
+    ingest_bytes for a file on disk (nightly exports, streamed HTTP uploads): hashed
+    and stored without reading it into memory (see uploads.save_upload_file).
+    """
+    refused = _refuse_unsupported(file_name, background)
+    if refused:
+        return refused
+    file_hash = save_upload_file(db_path, upload_dir, file_name, path, sha256=sha256, move=move)
+    return _load_saved(db_path, upload_dir, file_hash, file_name, mode, background)
+
+
+def _refuse_unsupported(file_name, background):
+    if ingest.is_supported_file(file_name):
+        return None
+    error = ingest.IngestValidationError(f"Unsupported file type: {file_name}")
+    if background:
+        raise error
+    return False, f"❌ {error}", 0
+
+
+def _load_saved(db_path, upload_dir, file_hash, file_name, mode, background):
+    if background:
+        return submit_ingest(db_path, upload_dir, file_hash, file_name, mode=mode)
+    return load_upload(db_path, upload_dir, file_hash, mode=mode)
+
+
+def record_count(db_path):
+    """Raw sales rows in the project"""
+    with db_connection(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+
+
+def clear_data(db_path):
+    """Delete every sales record in the project (saved files are kept)"""
+    with db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sales")
+        forecast_cache.bump_data_version(cursor)
+        conn.commit()
+    snapshot.write_snapshot(db_path)
+    cache.invalidate(db_path)
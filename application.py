@@ -1,607 +1,378 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-import numpy as np
-from datetime import datetime, timedelta
-import os
-import time
-
-# --- Constants & Setup ---
-USERS_DIR = "users"
-DEFAULT_USER = "DefaultUser"
-
-if not os.path.exists(USERS_DIR):
-    os.makedirs(USERS_DIR)
-
-# --- User Management Functions ---
-def get_users():
-    """Get list of existing users"""
-    if not os.path.exists(USERS_DIR):
-        return []
-    return [d for d in os.listdir(USERS_DIR) if os.path.isdir(os.path.join(USERS_DIR, d))]
-
-def create_user(username):
-    """Create a new user workspace with empty structure"""
-    user_dir = os.path.join(USERS_DIR, username)
-    if os.path.exists(user_dir):
-        return False
-    
-    # Create user directories
-    os.makedirs(user_dir)
-    os.makedirs(os.path.join(user_dir, "projects"))
-    os.makedirs(os.path.join(user_dir, "uploaded_files"))
-    
-    # Initialize empty database
-    user_db = os.path.join(user_dir, "data.db")
-    init_db(user_db)
-    
-    return True
-
-def init_user_workspace(username):
-    """Ensure user workspace exists with proper structure"""
-    user_dir = os.path.join(USERS_DIR, username)
-    if not os.path.exists(user_dir):
-        create_user(username)
-
-# --- Page Config ---
-st.set_page_config(
-    page_title="ShopPulse | Demand Predictor",
-    page_icon="📈",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# --- Database Functions ---
-def get_db_connection(db_path):
-    conn = sqlite3.connect(db_path)
-    return conn
-
-def init_db(db_path):
-    """Ensure table exists in the specified database"""
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            product_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            revenue REAL
-        )
-    ''')
-    conn.commit()
-    conn.close()
 
-# --- Sidebar & User/Project Selection ---
+import perf
+
+# --- Streamlit View ---
+# This file only draws pages. Data access, loading and forecasting live in
+# api.py / workspace.py, which scripts and workers can import directly.
+# Workspace modules load only after sign-in so the login form renders without
+# pandas; plotting, forecasting and upload handling load with the page that uses them.
+
+PAGES = ["📊 Dashboard", "🏢 Portfolio", "🔮 Demand Prediction", "📂 Upload Data"]
+JOB_POLL_SECONDS = 1.0
+JOBS_SHOWN = 5
+MARKER_MAX_POINTS = 120  # Forecast chart draws point markers only up to this many points
+CHART_BGCOLOR = '#262730'  # if dark_mode else 'white'
+FONT_COLOR = '#fafafa'  # if dark_mode else '#000000'
+
+
 # --- Authentication & Session Management ---
-import auth
+def authenticate_page():
+    """Restore or ask for a session; returns True once the user is signed in"""
+    import auth
+
+    # Initialize Session State
+    if 'authenticated' not in st.session_state:
+        st.session_state.authenticated = False
+    if 'current_user' not in st.session_state:
+        st.session_state.current_user = None
+    auth.restore_session()
 
-# Initialize Session State
-if 'authenticated' not in st.session_state:
-    st.session_state.authenticated = False
-if 'current_user' not in st.session_state:
-    st.session_state.current_user = None
+    if st.session_state.authenticated:
+        return True
 
-# Show Login/Signup if not authenticated
-if not st.session_state.authenticated:
+    # Show Login/Signup if not authenticated
     st.title("🔐 ShopPulse Authentication")
-    
+
     tab1, tab2 = st.tabs(["Sign In", "Sign Up"])
-    
+
     with tab1:
         auth.login_form()
-        
+
     with tab2:
         auth.signup_form()
-        
-    st.stop() # Stop execution here until logged in
 
-# --- Authenticated User Workspace ---
-# Initialize current user workspace
-init_user_workspace(st.session_state.current_user)
-user_dir = os.path.join(USERS_DIR, st.session_state.current_user)
+    return False
+
 
 # --- Sidebar ---
-st.sidebar.title("📈 ShopPulse")
-st.sidebar.markdown(f"**Welcome, {st.session_state.current_user}!**")
-
-if st.sidebar.button("Logout", type="secondary"):
-    st.session_state.authenticated = False
-    st.session_state.current_user = None
-    st.rerun()
-
-st.sidebar.markdown("---")
-
-st.sidebar.markdown("---")
-
-# Project Selection
-st.sidebar.subheader("🗂️ Workspace")
-user_projects_dir = os.path.join(user_dir, "projects")
-projects = [d for d in os.listdir(user_projects_dir) if os.path.isdir(os.path.join(user_projects_dir, d))]
-project_options = ["Default Project"] + projects
-selected_project = st.sidebar.selectbox("Select Project", project_options)
-
-# Determine Paths based on selection (user-specific)
-if selected_project == "Default Project":
-    current_db_path = os.path.join(user_dir, "data.db")
-    current_upload_dir = os.path.join(user_dir, "uploaded_files")
-else:
-    project_path = os.path.join(user_projects_dir, selected_project)
-    current_db_path = os.path.join(project_path, "data.db")
-    current_upload_dir = os.path.join(project_path, "uploads")
-
-# Ensure directories exist
-if not os.path.exists(current_upload_dir):
-    os.makedirs(current_upload_dir)
-# Ensure DB exists for selected project
-init_db(current_db_path)
-
-st.sidebar.markdown("---")
-page = st.sidebar.radio("Navigation", ["📊 Dashboard", "🔮 Demand Prediction", "📂 Upload Data"])
-st.sidebar.markdown("---")
-# dark_mode = st.sidebar.checkbox("🌙 Dark Mode", value=True)
-st.sidebar.info(f"👤 **User:** {st.session_state.current_user}")
-st.sidebar.info(f"🎯 **Project:** {selected_project}")
-
-# --- Custom CSS Styling ---
-# if dark_mode:
-    # DARK MODE CSS
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');
-    
-    /* Main Background */
-    .stApp {
-        background-color: #0e1117;
-        background-image: linear-gradient(to bottom right, #0e1117, #161b22);
-        color: #fafafa;
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    /* Sidebar */
-    [data-testid="stSidebar"] {
-        background-color: #1a1c24;
-        border-right: 1px solid #2d3436;
-    }
-    [data-testid="stSidebar"] * {
-        color: #dfe6e9 !important;
-    }
-    
-    /* Headers */
-    h1, h2, h3 {
-        color: #fafafa !important;
-        font-family: 'Poppins', sans-serif;
-        font-weight: 700;
-        letter-spacing: -0.5px;
-    }
-    
-    /* Metrics Cards */
-    div[data-testid="metric-container"] {
-        background: rgba(255, 255, 255, 0.05);
-        backdrop-filter: blur(10px);
-        padding: 20px;
-        border-radius: 15px;
-        box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        transition: transform 0.3s ease;
-    }
-    div[data-testid="metric-container"]:hover {
-        transform: translateY(-5px);
-        border-color: #3498db;
-    }
-    div[data-testid="metric-container"] label {
-        color: #b2bec3 !important;
-        font-size: 0.9rem;
-    }
-    div[data-testid="metric-container"] div[data-testid="stMetricValue"] {
-        color: #fafafa !important;
-        font-size: 1.8rem;
-        font-weight: 700;
-    }
-    
-    /* Buttons */
-    .stButton>button {
-        background: linear-gradient(90deg, #3498db, #2980b9);
-        color: white;
-        border-radius: 10px;
-        border: none;
-        padding: 12px 28px;
-        font-weight: 600;
-        letter-spacing: 0.5px;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 15px rgba(52, 152, 219, 0.3);
-    }
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(52, 152, 219, 0.5);
-    }
-    
-    /* Dataframes */
-    .stDataFrame {
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.3);
-        border: 1px solid #2d3436;
-    }
-    
-    /* Upload Box */
-    .upload-box {
-        background: rgba(255, 255, 255, 0.05) !important;
-        backdrop-filter: blur(10px);
-        color: #fafafa !important;
-        border: 1px dashed #3498db;
-    }
-    .upload-box h3, .upload-box p {
-        color: #fafafa !important;
-    }
-    
-    /* Radio Buttons (Navigation) */
-    div[row-widget="radio"] > div {
-        flex-direction: row;
-        align-items: stretch;
-        background-color: transparent;
-    }
-    div[row-widget="radio"] label {
-        background-color: #262730;
-        border: 1px solid #444;
-        padding: 12px;
-        border-radius: 12px;
-        margin-bottom: 8px;
-        transition: all 0.3s;
-        cursor: pointer;
-        font-weight: 500;
-    }
-    div[row-widget="radio"] label:hover {
-        background-color: #34495e;
-        border-color: #3498db;
-        transform: translateX(5px);
-    }
-    div[row-widget="radio"] label[data-baseweb="radio"] {
-        background: linear-gradient(90deg, #3498db, #2980b9) !important;
-        border-color: transparent !important;
-        box-shadow: 0 4px 15px rgba(52, 152, 219, 0.3);
-    }
-    </style>
-    """, unsafe_allow_html=True)
-# else:
-#     # LIGHT MODE CSS
-#     st.markdown("""
-#         <style>
-#         @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');
-        
-#         /* Main Background */
-#         .stApp {
-#             background-color: #f8f9fa;
-#             color: #2d3436;
-#             font-family: 'Poppins', sans-serif;
-#         }
-        
-#         /* Sidebar */
-#         [data-testid="stSidebar"] {
-#             background-color: #ffffff;
-#             border-right: 1px solid #e0e0e0;
-#         }
-#         [data-testid="stSidebar"] * {
-#             color: #2d3436 !important;
-#         }
-        
-#         /* Headers */
-#         h1, h2, h3 {
-#             color: #2d3436 !important;
-#             font-family: 'Poppins', sans-serif;
-#             font-weight: 700;
-#         }
-        
-#         /* Metrics Cards */
-#         div[data-testid="metric-container"] {
-#             background: white;
-#             padding: 20px;
-#             border-radius: 15px;
-#             box-shadow: 0 4px 20px rgba(0,0,0,0.05);
-#             border: 1px solid #f0f0f0;
-#             transition: transform 0.3s ease;
-#         }
-#         div[data-testid="metric-container"]:hover {
-#             transform: translateY(-5px);
-#             border-color: #3498db;
-#         }
-        
-#         /* Buttons */
-#         .stButton>button {
-#             background: linear-gradient(90deg, #3498db, #2980b9);
-#             color: white;
-#             border-radius: 10px;
-#             border: none;
-#             padding: 12px 28px;
-#             font-weight: 600;
-#             box-shadow: 0 4px 10px rgba(52, 152, 219, 0.2);
-#         }
-        
-#         /* Upload Box */
-#         .upload-box {
-#             background: white !important;
-#             color: #2d3436 !important;
-#             border: 1px dashed #3498db;
-#         }
-#         </style>
-#         """, unsafe_allow_html=True)
+def sidebar(username):
+    """User box, project picker and navigation; returns (project, db_path, upload_dir, page)"""
+    import auth
+    import workspace
+
+    # Initialize current user workspace
+    workspace.init_user_workspace(username)
+
+    st.sidebar.title("📈 ShopPulse")
+    st.sidebar.markdown(f"**Welcome, {username}!**")
+
+    if st.sidebar.button("Logout", type="secondary"):
+        auth.end_session()
+        st.rerun()
+
+    st.sidebar.markdown("---")
+
+    st.sidebar.markdown("---")
+
+    # Project Selection
+    st.sidebar.subheader("🗂️ Workspace")
+    selected_project = st.sidebar.selectbox("Select Project", workspace.list_projects(username))
+
+    # Ensure the upload folder and database exist for the selected project
+    db_path, upload_dir = workspace.open_project(username, selected_project)
+
+    st.sidebar.markdown("---")
+    page = st.sidebar.radio("Navigation", PAGES)
+    st.sidebar.markdown("---")
+    # dark_mode = st.sidebar.checkbox("🌙 Dark Mode", value=True)
+    st.sidebar.info(f"👤 **User:** {username}")
+    st.sidebar.info(f"🎯 **Project:** {selected_project}")
+    return selected_project, db_path, upload_dir, page
+
 
 # --- Dashboard Page ---
-if page == "📊 Dashboard":
-    st.title("📊 Business Overview")
-    st.markdown(f"Overview for **{selected_project}**")
-    
-    conn = get_db_connection(current_db_path)
-    try:
-        df = pd.read_sql_query("SELECT * FROM sales", conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Top Metrics Row
-        col1, col2, col3, col4 = st.columns(4)
-        
-        total_sales = df['quantity'].sum()
-        total_revenue = df['revenue'].sum() if 'revenue' in df.columns else 0
-        unique_products = df['product_name'].nunique()
-        latest_date = df['date'].max().strftime('%b %d, %Y')
-        
-        col1.metric("Total Units Sold", f"{total_sales:,.0f}")
-        col2.metric("Total Revenue", f"₹{total_revenue:,.2f}")
-        col3.metric("Active Products", unique_products)
-        col4.metric("Last Update", latest_date)
-        
-        st.markdown("---")
-        
-        # Charts Row 1
-        c1, c2 = st.columns(2)
-        
-        chart_bgcolor = '#262730' #if dark_mode else 'white'
-        font_color = '#fafafa' #if dark_mode else '#000000'
-        
-        with c1:
-            st.subheader("📈 Sales Trend")
-            sales_over_time = df.groupby('date')['quantity'].sum().reset_index()
-            fig_time = px.area(sales_over_time, x='date', y='quantity', 
-                             title='Daily Sales Volume',
-                             color_discrete_sequence=['#3498db'])
+def sales_charts(view, prefix):
+    """Sales Trend and Top Products charts for a dashboard-style view; spans are named '<prefix>.*'"""
+    import plotly.express as px
+    import downsample
+
+    # Charts Row 1
+    c1, c2 = st.columns(2)
+
+    with c1:
+        st.subheader("📈 Sales Trend")
+        resolution = st.radio("Resolution", list(downsample.RESOLUTIONS), horizontal=True,
+                              key=f"{prefix}_trend_resolution", label_visibility="collapsed")
+        # Bounded payload: resampled, then downsampled to the configured number of points
+        with perf.span(f'{prefix}.trend_figure') as s:
+            trend = downsample.chart_series(view['trend'], resolution)
+            s['rows'] = len(trend)
+            fig_time = px.area(trend, x='date', y='quantity',
+                               title=f'{resolution} Sales Volume',
+                               color_discrete_sequence=['#3498db'])
             fig_time.update_layout(
-                plot_bgcolor=chart_bgcolor, 
-                paper_bgcolor=chart_bgcolor,
-                font_color=font_color
+                plot_bgcolor=CHART_BGCOLOR,
+                paper_bgcolor=CHART_BGCOLOR,
+                font_color=FONT_COLOR
             )
+        with perf.span(f'{prefix}.trend_chart'):
             st.plotly_chart(fig_time, use_container_width=True)
-            
-        with c2:
-            st.subheader("🏆 Top Products")
-            product_dist = df.groupby('product_name')['quantity'].sum().reset_index().sort_values('quantity', ascending=True).tail(10)
-            fig_prod = px.bar(product_dist, y='product_name', x='quantity', orientation='h',
-                            title='Best Selling Products',
-                            color='quantity',
-                            color_continuous_scale='Blues')
+
+    with c2:
+        st.subheader("🏆 Top Products")
+        with perf.span(f'{prefix}.top_figure', rows=len(view['top_products'])):
+            fig_prod = px.bar(view['top_products'], y='product_name', x='quantity', orientation='h',
+                              title='Best Selling Products',
+                              color='quantity',
+                              color_continuous_scale='Blues')
             fig_prod.update_layout(
-                plot_bgcolor=chart_bgcolor, 
-                paper_bgcolor=chart_bgcolor,
-                font_color=font_color
+                plot_bgcolor=CHART_BGCOLOR,
+                paper_bgcolor=CHART_BGCOLOR,
+                font_color=FONT_COLOR
             )
+        with perf.span(f'{prefix}.top_chart'):
             st.plotly_chart(fig_prod, use_container_width=True)
-            
+
+
+def dashboard_page(project, db_path):
+    import api
+
+    st.title("📊 Business Overview")
+    st.markdown(f"Overview for **{project}**")
+
+    # Metric cards come from SQLite; both charts slice the project's cached sales matrix
+    try:
+        with perf.span('dashboard.data'):
+            view = api.dashboard(db_path)
+    except Exception:
+        view = {'active_products': 0}
+
+    if view['active_products'] > 0:
+        # Top Metrics Row
+        col1, col2, col3, col4 = st.columns(4)
+
+        col1.metric("Total Units Sold", f"{view['total_units']:,.0f}")
+        col2.metric("Total Revenue", f"₹{view['total_revenue']:,.2f}")
+        col3.metric("Active Products", view['active_products'])
+        col4.metric("Last Update", view['latest_date'].strftime('%b %d, %Y'))
+
+        st.markdown("---")
+
+        sales_charts(view, 'dashboard')
+
     else:
         st.info("👋 Welcome! Please go to the **Upload Data** page to get started.")
 
+
+# --- Portfolio Page ---
+def portfolio_page(username):
+    import api
+
+    st.title("🏢 Portfolio Overview")
+    st.markdown(f"All projects of **{username}**")
+
+    # Each project's totals are cached per data version; only projects with new data are re-read
+    with perf.span('portfolio.data'):
+        view = api.portfolio(username)
+    projects = view['projects']
+
+    if view['active_products'] == 0:
+        st.info("👋 No sales data in any project yet. Please go to the **Upload Data** page to get started.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Units Sold", f"{view['total_units']:,.0f}")
+    col2.metric("Total Revenue", f"₹{view['total_revenue']:,.2f}")
+    col3.metric("Active Products", view['active_products'])
+    col4.metric("Projects With Data", f"{(projects['products'] > 0).sum()} of {len(projects)}")
+
+    st.markdown("---")
+
+    sales_charts(view, 'portfolio')
+
+    st.subheader("🗂️ Projects")
+    st.dataframe(
+        projects.sort_values('units', ascending=False),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'project': "Project",
+            'units': st.column_config.NumberColumn("Units Sold", format="%d"),
+            'revenue': st.column_config.NumberColumn("Revenue", format="₹%.2f"),
+            'products': "Products",
+            'latest_date': st.column_config.DateColumn("Last Update", format="MMM DD, YYYY"),
+        },
+    )
+
+
 # --- Prediction Page ---
-elif page == "🔮 Demand Prediction":
+def demand_suggestion(product, growth):
+    """Suggestion text with its box and text colours for a forecast growth (%)"""
+    if growth > 20:
+        suggestion = f"🚀 **High Demand Alert!** Sales for **{product}** are expected to surge by {growth:.1f}%. Consider increasing your inventory orders immediately to avoid stockouts."
+        box_color = "#d4edda" #if not dark_mode else "#1e4620"
+        text_color = "black" #if not dark_mode else "#d4edda"
+    elif growth > 5:
+        suggestion = f"📈 **Steady Growth.** Demand is rising moderately ({growth:.1f}%). Maintain healthy stock levels and monitor closely."
+        box_color = "#fff3cd" #if not dark_mode else "#4d3e14"
+        text_color = "black" #if not dark_mode else "#fff3cd"
+    elif growth > -5:
+        suggestion = f"⚖️ **Stable Demand.** Sales are expected to remain consistent. Standard restocking is recommended."
+        box_color = "#d1ecf1" #if not dark_mode else "#103f47"
+        text_color = "black" #if not dark_mode else "#d1ecf1"
+    else:
+        suggestion = f"📉 **Declining Trend.** Demand is projected to drop by {abs(growth):.1f}%. Consider running a promotion or reducing future orders to prevent overstocking."
+        box_color = "#f8d7da" #if not dark_mode else "#4c1d21"
+        text_color = "black" #if not dark_mode else "#f8d7da"
+    return suggestion, box_color, text_color
+
+
+def prediction_page(project, db_path):
+    import pandas as pd
+    import plotly.express as px
+    import api
+    import downsample
+
     st.title("🔮 AI Demand Forecast")
-    st.markdown(f"Predictions for **{selected_project}**")
-    
-    conn = get_db_connection(current_db_path)
+    st.markdown(f"Predictions for **{project}**")
+
+    # Forecasts come from the project's cache; only products with new data are refitted.
+    # The model is read from the Configuration selectbox's state before it is drawn.
+    model_name = st.session_state.get("forecast_model", api.MODEL_NAME)
     try:
-        df = pd.read_sql_query("SELECT * FROM sales", conn)
+        with perf.span('prediction.forecasts', model=model_name) as s:
+            forecasts = api.load_forecasts(db_path, model_name)
+            s['rows'] = len(forecasts)
     except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
-        products = sorted(df['product_name'].unique())
-        
-        col1, col2 = st.columns([1, 3])
-        
-        with col1:
-            st.markdown("### Configuration")
-            selected_product = st.selectbox("Select Product", products)
-            forecast_days = st.slider("Forecast Days", 7, 60, 30)
-            
-        with col2:
-            if selected_product:
-                # Filter data for product
-                product_data = df[df['product_name'] == selected_product].copy()
-                product_data = product_data.groupby('date')['quantity'].sum().reset_index()
-                product_data = product_data.sort_values('date')
-                
-                if len(product_data) < 5:
-                    st.warning("⚠️ Not enough data points to make a reliable prediction. Need at least 5 days of data.")
-                else:
-                    # Prepare data for Linear Regression
-                    product_data['date_ordinal'] = product_data['date'].map(datetime.toordinal)
-                    
-                    X = product_data[['date_ordinal']]
-                    y = product_data['quantity']
-                    
-                    model = LinearRegression()
-                    model.fit(X, y)
-                    
-                    # Predict next N days
-                    last_date = product_data['date'].max()
-                    future_dates = [last_date + timedelta(days=x) for x in range(1, forecast_days + 1)]
-                    future_ordinals = [[d.toordinal()] for d in future_dates]
-                    
-                    future_predictions = model.predict(future_ordinals)
-                    future_predictions = [max(0, p) for p in future_predictions]
-                    
-                    # Create DataFrame for plotting
-                    future_df = pd.DataFrame({
-                        'date': future_dates,
-                        'quantity': future_predictions,
-                        'type': 'Predicted'
-                    })
-                    
-                    product_data['type'] = 'Historical'
-                    
-                    combined_df = pd.concat([product_data[['date', 'quantity', 'type']], future_df])
-                    
-                    # Plot
-                    chart_bgcolor = '#262730' #if dark_mode else 'white'
-                    font_color = '#fafafa' #if dark_mode else '#2c3e50'
-
-                    fig_forecast = px.line(combined_df, x='date', y='quantity', color='type', 
-                                         title=f'Demand Forecast: {selected_product}',
-                                         color_discrete_map={"Historical": "#95a5a6", "Predicted": "#2ecc71"},
-                                         markers=True)
-                    
-                    fig_forecast.add_vline(x=last_date.timestamp() * 1000, line_width=1, line_dash="dash", line_color="red")
-                    fig_forecast.update_layout(
-                        plot_bgcolor=chart_bgcolor, 
-                        paper_bgcolor=chart_bgcolor, 
-                        font_color=font_color,
-                        hovermode="x unified"
-                    )
-                    
-                    st.plotly_chart(fig_forecast, use_container_width=True)
-                    
-                    # Insights
-                    avg_predicted = sum(future_predictions) / len(future_predictions)
-                    current_avg = product_data['quantity'].mean()
-                    growth = ((avg_predicted - current_avg) / current_avg) * 100
-                    
-                    st.markdown("### 💡 Insights")
-                    i1, i2, i3 = st.columns(3)
-                    i1.metric("Predicted Avg Daily Demand", f"{avg_predicted:.1f} units")
-                    i2.metric("Expected Growth", f"{growth:+.1f}%", delta_color="normal")
-                    i3.metric("Recommended Stock", f"{sum(future_predictions):.0f} units", help=f"Total units needed for next {forecast_days} days")
-                    
-                    st.markdown("### 🤖 Suggestion")
-                    if growth > 20:
-                        suggestion = f"🚀 **High Demand Alert!** Sales for **{selected_product}** are expected to surge by {growth:.1f}%. Consider increasing your inventory orders immediately to avoid stockouts."
-                        box_color = "#d4edda" #if not dark_mode else "#1e4620"
-                        text_color = "black" #if not dark_mode else "#d4edda"
-                    elif growth > 5:
-                        suggestion = f"📈 **Steady Growth.** Demand is rising moderately ({growth:.1f}%). Maintain healthy stock levels and monitor closely."
-                        box_color = "#fff3cd" #if not dark_mode else "#4d3e14"
-                        text_color = "black" #if not dark_mode else "#fff3cd"
-                    elif growth > -5:
-                        suggestion = f"⚖️ **Stable Demand.** Sales are expected to remain consistent. Standard restocking is recommended."
-                        box_color = "#d1ecf1" #if not dark_mode else "#103f47"
-                        text_color = "black" #if not dark_mode else "#d1ecf1"
-                    else:
-                        suggestion = f"📉 **Declining Trend.** Demand is projected to drop by {abs(growth):.1f}%. Consider running a promotion or reducing future orders to prevent overstocking."
-                        box_color = "#f8d7da" #if not dark_mode else "#4c1d21"
-                        text_color = "black" #if not dark_mode else "#f8d7da"
-                        
-                    st.markdown(f"""
-                    <div style="background-color: {box_color}; color: {text_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {text_color};">
-                        {suggestion}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-# --- Helper Functions ---
-def process_excel_file(file_path, db_path, mode="Append"):
-    """
-    Reads an Excel file and efficiently loads it into the database using bulk operations.
-    Returns: (success_bool, message_string, count_int)
-    """
-    try:
-        conn = get_db_connection(db_path)
-        cursor = conn.cursor()
-        
-        df_load = pd.read_excel(file_path)
-        
-        # Validate columns
-        col_map = {str(col).lower().strip(): col for col in df_load.columns}
-        required_keys = ['date', 'product', 'quantity']
-        
-        if not all(key in col_map for key in required_keys):
-            conn.close()
-            return False, "❌ File missing required columns (Date, Product, Quantity).", 0
-
-        if mode == "Replace Database":
-            cursor.execute("DELETE FROM sales")
-        
-        # Insert data
-        date_col = col_map['date']
-        prod_col = col_map['product']
-        qty_col = col_map['quantity']
-        price_col = col_map.get('price')
-        rev_col = col_map.get('revenue')
-
-        # --- OPTIMIZED BULK LOAD ---
-        # 1. Pre-process Data in Memory (Vectorized)
-        df_load.rename(columns={
-            date_col: 'date',
-            prod_col: 'product_name',
-            qty_col: 'quantity'
-        }, inplace=True)
-        
-        # Format Date
-        df_load['date'] = pd.to_datetime(df_load['date']).dt.strftime('%Y-%m-%d')
-        
-        # Calculate Revenue
-        if price_col and price_col in df_load.columns:
-            df_load['revenue'] = df_load['quantity'] * df_load[price_col].fillna(0)
-        elif rev_col and rev_col in df_load.columns:
-            df_load['revenue'] = df_load[rev_col].fillna(0)
+        forecasts = pd.DataFrame()
+
+    if forecasts.empty:
+        return
+    products = list(forecasts.index)
+
+    col1, col2 = st.columns([1, 3])
+
+    with col1:
+        st.markdown("### Configuration")
+        selected_product = st.selectbox("Select Product", products)
+        st.selectbox("Model", list(api.MODELS), key="forecast_model", format_func=lambda m: api.MODELS[m].label)
+        forecast_days = st.slider("Forecast Days", 7, 60, 30)
+        resolution = st.radio("Chart Resolution", list(downsample.RESOLUTIONS), horizontal=True,
+                              help="Weekly and monthly points show average daily demand")
+
+        # Encoded once per model, horizon and data version; slider moves and product switches reuse it
+        with perf.span('prediction.export', days=forecast_days) as s:
+            export = api.forecast_csv(db_path, forecast_days, model_name)
+            s['bytes'] = len(export)
+        st.download_button(
+            "⬇️ Download All Forecasts (CSV)",
+            export,
+            file_name=f"forecast_{model_name}_{forecast_days}d.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+
+    with col2:
+        if not selected_product:
+            return
+        # History (gap-filled from the same matrix the forecaster fits) and the cached forecast
+        with perf.span('prediction.product'):
+            outlook = api.product_forecast(db_path, selected_product, forecast_days, model_name)
+        if outlook['forecast'] is None:
+            st.warning("⚠️ Not enough data points to make a reliable prediction. Need at least 5 days of data.")
+            return
+
+        # Averaged per period so weekly / monthly points stay comparable with the daily forecast;
+        # the history is downsampled to whatever of the point budget the forecast leaves
+        future_df = downsample.resample(outlook['forecast'], resolution, "mean", y='predicted_quantity')
+        future_df = future_df.rename(columns={'predicted_quantity': 'quantity'}).assign(type='Predicted')
+        history_points = max(downsample.MAX_CHART_POINTS - len(future_df), downsample.MIN_CHART_POINTS)
+        history = downsample.chart_series(outlook['history'], resolution, history_points, "mean")
+        product_data = history.assign(type='Historical')
+        combined_df = pd.concat([product_data, future_df])
+        last_date = outlook['history']['date'].max()
+
+        # Plot
+        with perf.span('prediction.figure', rows=len(combined_df)):
+            fig_forecast = px.line(combined_df, x='date', y='quantity', color='type',
+                                   title=f'Demand Forecast: {selected_product} ({api.MODELS[model_name].label})',
+                                   color_discrete_map={"Historical": "#95a5a6", "Predicted": "#2ecc71"},
+                                   markers=len(combined_df) <= MARKER_MAX_POINTS)
+
+            fig_forecast.add_vline(x=last_date.timestamp() * 1000, line_width=1, line_dash="dash", line_color="red")
+            fig_forecast.update_layout(
+                plot_bgcolor=CHART_BGCOLOR,
+                paper_bgcolor=CHART_BGCOLOR,
+                font_color=FONT_COLOR,
+                hovermode="x unified"
+            )
+
+        with perf.span('prediction.chart'):
+            st.plotly_chart(fig_forecast, use_container_width=True)
+
+        # Insights
+        growth = outlook['growth']
+
+        st.markdown("### 💡 Insights")
+        i1, i2, i3 = st.columns(3)
+        i1.metric("Predicted Avg Daily Demand", f"{outlook['avg_predicted']:.1f} units")
+        i2.metric("Expected Growth", f"{growth:+.1f}%", delta_color="normal")
+        i3.metric("Recommended Stock", f"{outlook['recommended_stock']:.0f} units", help=f"Total units needed for next {forecast_days} days")
+
+        st.markdown("### 🤖 Suggestion")
+        suggestion, box_color, text_color = demand_suggestion(selected_product, growth)
+        st.markdown(f"""
+        <div style="background-color: {box_color}; color: {text_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {text_color};">
+            {suggestion}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+# --- Background Load Status ---
+def queue_ingest(db_path, upload_dir, file_hash, file_name, mode):
+    """Hand a saved file to the background loader and track the job in this session"""
+    import api
+
+    job_id = api.submit_ingest(db_path, upload_dir, file_hash, file_name, mode=mode)
+    st.session_state.setdefault('ingest_jobs', []).append(job_id)
+    return job_id
+
+
+def show_ingest_jobs():
+    """Status of this session's latest loads, polled in a fragment while any is still active"""
+    import api
+
+    job_ids = st.session_state.get('ingest_jobs', [])[-JOBS_SHOWN:]
+    if not job_ids:
+        return
+    active = api.get_jobs(job_ids)['status'].isin(api.ACTIVE_STATUSES).any()
+    st.fragment(ingest_jobs_panel, run_every=JOB_POLL_SECONDS if active else None)(job_ids)
+
+
+def ingest_jobs_panel(job_ids):
+    import pandas as pd
+    import api
+
+    jobs = api.get_jobs(job_ids)
+    seen = st.session_state.setdefault('ingest_jobs_finished', set())
+    newly_finished = False
+    for job_id, job in jobs.iterrows():
+        if job.status in api.ACTIVE_STATUSES:
+            fraction = 0.0 if pd.isna(job.fraction) else min(job.fraction, 1.0)
+            label = "queued" if job.status == "queued" else f"{job.rows_loaded:,} rows loaded"
+            st.progress(fraction, text=f"⏳ {job.file_name}: {label}")
+            continue
+        if job.status == "done":
+            st.success(f"{job.file_name}: {job.message}")
         else:
-            df_load['revenue'] = 0.0
-            
-        # Keep only necessary columns
-        final_df = df_load[['date', 'product_name', 'quantity', 'revenue']].copy()
-        
-        # 2. Database Transaction
-        inserted_count = len(final_df)
-        try:
-            # Dump to temp table
-            final_df.to_sql('temp_sales_import', conn, if_exists='replace', index=False)
-            
-            # Bulk Delete (Deduplication)
-            # Remove rows from 'sales' that match (date, product) in temp table
-            cursor.execute('''
-                DELETE FROM sales 
-                WHERE EXISTS (
-                    SELECT 1 FROM temp_sales_import 
-                    WHERE sales.date = temp_sales_import.date 
-                    AND sales.product_name = temp_sales_import.product_name
-                )
-            ''')
-            
-            # Bulk Insert
-            cursor.execute('''
-                INSERT INTO sales (date, product_name, quantity, revenue)
-                SELECT date, product_name, quantity, revenue FROM temp_sales_import
-            ''')
-            
-            # Cleanup
-            cursor.execute("DROP TABLE temp_sales_import")
-            conn.commit()
-        except Exception as db_err:
-            conn.rollback()
-            raise db_err
-            
-        conn.close()
-        return True, f"✅ Successfully loaded {inserted_count} records!", inserted_count
-        
-    except Exception as e:
-        return False, f"Error processing file: {e}", 0
+            st.error(f"{job.file_name}: {job.message}")
+        if job_id not in seen:
+            seen.add(job_id)
+            newly_finished = True
+    if newly_finished:
+        st.rerun()  # Refresh the record counts and stop polling once nothing is running
+
 
 # --- Upload Data Page ---
-if page == "📂 Upload Data":
+def upload_page(username, db_path, upload_dir):
+    from datetime import datetime
+    import api
+    import workspace
+    from ingest import UPLOAD_TYPES
+
     st.title("📂 Data Management")
-    
+
     with st.container():
         st.markdown("""
         <div class='upload-box' style='padding: 20px; border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
@@ -611,13 +382,13 @@ if page == "📂 Upload Data":
         """, unsafe_allow_html=True)
 
         st.write("")
-        
+
         # --- NEW: Direct Upload Section ---
         col_up1, col_up2 = st.columns([2, 1])
-        
+
         with col_up1:
-            uploaded_file = st.file_uploader("Choose Excel File", type=["xlsx", "xls"])
-            
+            uploaded_file = st.file_uploader("Choose Sales File (Excel, CSV, CSV.GZ, Parquet)", type=UPLOAD_TYPES)
+
         with col_up2:
             st.write("<b>Settings</b>", unsafe_allow_html=True)
             upload_destination = st.radio("Target", ["Current Project", "New Project"], horizontal=False, label_visibility="collapsed")
@@ -626,121 +397,141 @@ if page == "📂 Upload Data":
                 new_project_name = st.text_input("Project Name", placeholder="New Project Name")
 
         if uploaded_file is not None:
-             if st.button("🚀 Save & Process Data", type="primary", use_container_width=True):
+            if st.button("🚀 Save & Process Data", type="primary", use_container_width=True):
                 try:
                     # 1. Determine Paths
                     if upload_destination == "New Project" and new_project_name.strip():
-                        safe_project_name = "".join([c for c in new_project_name if c.isalnum() or c in (' ', '_', '-')]).strip()
-                        if not safe_project_name:
-                            st.error("Invalid project name.")
-                            st.stop()
-                        target_project_dir = os.path.join(user_projects_dir, safe_project_name)
-                        active_upload_dir = os.path.join(target_project_dir, "uploads")
-                        active_db_path = os.path.join(target_project_dir, "data.db")
-                        
-                        if not os.path.exists(active_upload_dir):
-                            os.makedirs(active_upload_dir)
-                        init_db(active_db_path)
-                        st.success(f"Created project: **{safe_project_name}**")
+                        project, active_db_path, active_upload_dir = workspace.create_project(username, new_project_name)
+                        st.success(f"Created project: **{project}**")
                     else:
-                        active_upload_dir = current_upload_dir
-                        active_db_path = current_db_path
-
-                    # 2. Save File
-                    original_filename = uploaded_file.name
-                    
-                    # Deduplicate local file
-                    existing_files = os.listdir(active_upload_dir)
-                    for existing_file in existing_files:
-                        try:
-                            parts = existing_file.split('_', 1)
-                            if len(parts) > 1:
-                                stored_filename = parts[1]
-                                if stored_filename.lower() == original_filename.lower():
-                                    os.remove(os.path.join(active_upload_dir, existing_file))
-                        except Exception:
-                            continue
-
-                    timestamp = int(time.time())
-                    saved_filename = f"{timestamp}_{original_filename}"
-                    file_path = os.path.join(active_upload_dir, saved_filename)
-                    
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    st.info(f"File saved: {saved_filename}")
-
-                    # 3. Process & Load to DB
-                    success, msg, count = process_excel_file(file_path, active_db_path, mode="Append")
-                    
-                    if success:
-                        st.success(msg)
-                        time.sleep(1.5)
-                        st.rerun()
-                    else:
-                        st.error(msg)
-                        
+                        active_upload_dir = upload_dir
+                        active_db_path = db_path
+
+                    # 2. Save File (content-addressed; identical bytes are stored once)
+                    file_hash = api.save_upload(active_db_path, active_upload_dir, uploaded_file.name,
+                                                uploaded_file.getbuffer())
+                    st.info(f"File saved: {uploaded_file.name}")
+
+                    # 3. Process & Load to DB in the background (skipped if this content is already loaded)
+                    queue_ingest(active_db_path, active_upload_dir, file_hash, uploaded_file.name, mode="Append")
+
                 except Exception as e:
                     st.error(f"Error: {e}")
 
+        show_ingest_jobs()
+
         st.markdown("---")
-        
+
         # Manage Data Section (Collapsed)
         with st.expander("🗑️ Manage Saved Files & Database"):
             # --- File Management ---
             st.subheader("📂 Saved Files")
-            
-            files = os.listdir(current_upload_dir)
-            st.write(f"**Total Saved Files:** {len(files)}")
-            
+
+            saved_files = api.list_uploads(db_path)
+            st.write(f"**Total Saved Files:** {len(saved_files)}")
+            file_labels = {
+                file_hash: f"{entry.original_name} ({datetime.fromtimestamp(entry.uploaded_at):%Y-%m-%d %H:%M})"
+                for file_hash, entry in saved_files.iterrows()
+            }
+
             # --- Load Saved File ---
-            if len(files) > 0:
+            if len(saved_files) > 0:
                 col_load1, col_load2 = st.columns([3, 1])
                 with col_load1:
-                    file_to_load = st.selectbox("Load existing file", ["Select..."] + files)
-                
+                    file_to_load = st.selectbox("Load existing file", ["Select..."] + list(file_labels),
+                                                format_func=lambda h: file_labels.get(h, h))
+
                 if file_to_load != "Select...":
                     load_mode = st.radio("Mode", ["Append to Database", "Replace Database"], horizontal=True)
-                    
+
                     if st.button("Re-Load Data", type="primary"):
-                        file_path = os.path.join(current_upload_dir, file_to_load)
-                        success, msg, count = process_excel_file(file_path, current_db_path, mode=load_mode)
-                        if success:
-                            st.success(msg)
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            st.error(msg)
-            
+                        queue_ingest(db_path, upload_dir, file_to_load,
+                                     saved_files.at[file_to_load, 'original_name'], mode=load_mode)
+                        st.rerun()  # Show the job's progress above
+
             st.markdown("---")
-            
+
             # --- Delete Files ---
-            if len(files) > 0:
-                files_to_delete = st.multiselect("Select files to delete", files)
+            if len(saved_files) > 0:
+                files_to_delete = st.multiselect("Select files to delete", list(file_labels),
+                                                 format_func=lambda h: file_labels[h])
                 if st.button("🗑️ Delete Selected"):
-                     for f in files_to_delete:
-                        try:
-                            os.remove(os.path.join(current_upload_dir, f))
-                        except: pass
-                     st.rerun()
+                    api.delete_uploads(db_path, upload_dir, files_to_delete)
+                    st.rerun()
 
             st.markdown("---")
 
             # --- Database Management ---
-            conn = get_db_connection(current_db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sales")
-            count = cursor.fetchone()[0]
-            conn.close()
-            
+            count = api.record_count(db_path)
+
             st.write(f"**Total Sales Records:** {count}")
-            
+
             if count > 0:
                 if st.button("Clear All Database Records", type="primary"):
-                    conn = get_db_connection(current_db_path)
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM sales")
-                    conn.commit()
-                    conn.close()
+                    api.clear_data(db_path)
                     st.success("Cleared.")
                     st.rerun()
+
+
+# --- Performance Panel ---
+def performance_panel(spans):
+    """Admin-only sidebar breakdown of this rerun's timed stages and the data cache"""
+    import pandas as pd
+    import cache
+
+    with st.sidebar.expander("⏱️ Performance"):
+        if spans:
+            table = pd.DataFrame(spans).reindex(columns=['name', 'depth', 'ms', 'rows', 'bytes'])
+            table[['rows', 'bytes']] = table[['rows', 'bytes']].astype('Int64')
+            table['stage'] = ["· " * depth + name for depth, name in zip(table['depth'], table['name'])]
+            st.dataframe(table[['stage', 'ms', 'rows', 'bytes']], hide_index=True, use_container_width=True)
+            st.caption(f"Rerun: {table.loc[table['depth'] == 0, 'ms'].sum():,.0f} ms timed")
+        stats = cache.cache_stats()
+        st.caption(f"Data cache: {stats['entries']} entries, {stats['bytes'] / 1e6:,.1f} of "
+                   f"{stats['max_bytes'] / 1e6:,.0f} MB, hit rate {stats['hit_rate']:.0%}")
+
+
+# --- App ---
+def main():
+    st.set_page_config(
+        page_title="ShopPulse | Demand Predictor",
+        page_icon="📈",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Every stage timed during this rerun is collected, then written to the metrics log
+    run = perf.begin_run(page="Sign In")
+    try:
+        if not authenticate_page():
+            return  # Stop here until logged in
+
+        import auth
+        import theme
+
+        username = st.session_state.current_user
+        with perf.span('sidebar'):
+            project, db_path, upload_dir, page = sidebar(username)
+        run.update(user=username, project=project, page=page.split(" ", 1)[1])
+
+        # --- Custom CSS Styling ---
+        theme.apply_theme()
+
+        with perf.span('page'):
+            if page == PAGES[0]:
+                dashboard_page(project, db_path)
+            elif page == PAGES[1]:
+                portfolio_page(username)
+            elif page == PAGES[2]:
+                prediction_page(project, db_path)
+            else:
+                upload_page(username, db_path, upload_dir)
+
+        if auth.is_admin(username):
+            performance_panel(perf.current_spans())
+    finally:
+        perf.end_run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,52 @@
-import hashlib
-import sqlite3
-import os
 import streamlit as st
-import time
 
-AUTH_DB = "users.db"
+import perf
+from auth_service import (
+    AUTH_DB,
+    init_auth_db,
+    hash_password,
+    create_user_account,
+    verify_login,
+    authenticate,
+    issue_session_token,
+    verify_session_token,
+    revoke_sessions,
+    is_admin,
+)
 
-def init_auth_db():
-    conn = sqlite3.connect(AUTH_DB)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password_hash TEXT NOT NULL,
-            salt TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# The session token rides in the page URL so a reload stays signed in. That puts it in
+# browser history and in any copied link, so app tokens are their own kind (separate
+# from HTTP API tokens), last APP_SESSION_TTL_SECONDS (renewed on each reload), and
+# are all revoked server-side on logout. Do not share dashboard URLs.
+SESSION_PARAM = "session"  # Query parameter holding the signed session token
 
-def hash_password(password, salt=None):
-    if salt is None:
-        salt = os.urandom(32).hex() # 64 chars
-    
-    # Simple SHA-256 with salt
-    # In production, use bcrypt or argon2 (e.g. via 'passlib'), 
-    # but hashlib is standard lib and sufficient for this requirement.
-    key = hashlib.pbkdf2_hmac(
-        'sha256', 
-        password.encode('utf-8'), 
-        bytes.fromhex(salt), 
-        100000 
-    )
-    return key.hex(), salt
+# --- Sessions ---
 
-def create_user_account(username, password):
-    if not username or not password:
-        return False, "Username and password required."
-    
-    try:
-        init_auth_db() # Ensure DB exists
-        conn = sqlite3.connect(AUTH_DB)
-        cursor = conn.cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT username FROM users WHERE username = ?", (username,))
-        if cursor.fetchone():
-            conn.close()
-            return False, "Username already exists."
-        
-        # Create user
-        p_hash, salt = hash_password(password)
-        cursor.execute("INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)", 
-                       (username, p_hash, salt))
-        conn.commit()
-        conn.close()
-        return True, "Account created successfully!"
-    except Exception as e:
-        return False, f"Error creating account: {e}"
+def start_session(username, token=None):
+    st.session_state.authenticated = True
+    st.session_state.current_user = username
+    st.query_params[SESSION_PARAM] = token or issue_session_token(username)
+
+def end_session():
+    """Sign out: revoke the user's session tokens server-side, not just drop this page's copy"""
+    if st.session_state.get("current_user"):
+        revoke_sessions(st.session_state.current_user)
+    st.session_state.authenticated = False
+    st.session_state.current_user = None
+    st.query_params.pop(SESSION_PARAM, None)
 
-def verify_login(username, password):
-    try:
-        init_auth_db()
-        conn = sqlite3.connect(AUTH_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT password_hash, salt FROM users WHERE username = ?", (username,))
-        record = cursor.fetchone()
-        conn.close()
-        
-        if not record:
-            return False
-        
-        stored_hash, salt = record
-        
-        # Re-hash input
-        input_hash, _ = hash_password(password, salt)
-        
-        return input_hash == stored_hash
-    except Exception:
-        return False
+def restore_session():
+    """Sign a reloaded page back in from its session token (an HMAC check, no password hash) and renew it"""
+    if st.session_state.get("authenticated"):
+        return
+    token = st.query_params.get(SESSION_PARAM)
+    if not token:
+        return
+    username = verify_session_token(token)
+    if username:
+        start_session(username)
+    else:
+        st.query_params.pop(SESSION_PARAM, None)
 
 # --- UI Components ---
 
@@ -90,14 +56,13 @@ def login_form():
     password = st.text_input("Password", type="password", key="login_pass")
     
     if st.button("Login", type="primary"):
-        if verify_login(username, password):
-            st.session_state.authenticated = True
-            st.session_state.current_user = username
-            st.success(f"Welcome back, {username}!")
-            time.sleep(0.5)
+        with perf.span('auth.verify_login'):
+            success, msg = authenticate(username, password)
+        if success:
+            start_session(username)
             st.rerun()
         else:
-            st.error("Invalid username or password.")
+            st.error(msg)
 
 def signup_form():
     st.subheader("Sign Up")
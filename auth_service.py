@@ -0,0 +1,263 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+from db import db_connection
+
+# --- Constants ---
+AUTH_DB = "users.db"
+SECRET_ENV_VAR = "SHOPPULSE_SECRET"
+ADMINS_ENV_VAR = "SHOPPULSE_ADMINS"  # Comma-separated usernames who see the Performance panel
+SECRET_FILE = ".auth_secret"  # Created next to the users database when the env var is unset
+PBKDF2_ITERATIONS = 100000
+HASH_WORKERS = max(2, min(4, os.cpu_count() or 1))
+HASH_QUEUE_LIMIT = HASH_WORKERS * 8  # Hashes queued or running at once
+HASH_WAIT_SECONDS = 15  # How long a login waits for a queue slot before it is turned away
+MAX_FAILED_LOGINS = 5
+FAILED_LOGIN_WINDOW_SECONDS = 300
+MAX_TRACKED_USERNAMES = 10000  # Failure histories kept at once; the oldest are dropped beyond this
+SESSION_TTL_SECONDS = 12 * 3600  # HTTP API bearer tokens
+APP_SESSION_TTL_SECONDS = 30 * 60  # App tokens travel in the page URL, so they expire much sooner
+# Token kind -> (users column holding its epoch, default lifetime); each kind is revoked separately
+SESSION_KINDS = {
+    'app': ('session_epoch', APP_SESSION_TTL_SECONDS),
+    'api': ('api_session_epoch', SESSION_TTL_SECONDS),
+}
+
+_initialized = set()
+_secret = None
+_secret_lock = threading.Lock()
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pbkdf2")
+_hash_slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+_failed_logins = {}  # username -> deque of failure timestamps
+_failed_lock = threading.Lock()
+
+
+class AuthBusyError(RuntimeError):
+    """Too many password hashes are already queued"""
+
+
+# --- Users Database ---
+def init_auth_db(auth_db=AUTH_DB):
+    """Create the users table once per process (again if the file was removed)"""
+    key = os.path.abspath(auth_db)
+    if key in _initialized and os.path.exists(auth_db):
+        return
+    with db_connection(auth_db) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password_hash TEXT NOT NULL,
+                salt TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                session_epoch INTEGER NOT NULL DEFAULT 0,
+                api_session_epoch INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        # Users databases created before session revocation
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        for column, _ in SESSION_KINDS.values():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE users ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+    _initialized.add(key)
+
+
+def _fetch_credentials(username, auth_db):
+    init_auth_db(auth_db)
+    with db_connection(auth_db) as conn:
+        return conn.execute("SELECT password_hash, salt FROM users WHERE username = ?", (username,)).fetchone()
+
+
+def _fetch_session_epoch(username, kind, auth_db):
+    init_auth_db(auth_db)
+    column, _ = SESSION_KINDS[kind]
+    with db_connection(auth_db) as conn:
+        row = conn.execute(f"SELECT {column} FROM users WHERE username = ?", (username,)).fetchone()
+    return None if row is None else row[0]
+
+
+# --- Password Hashing ---
+# PBKDF2 releases the GIL, so a small thread pool runs hashes in parallel while
+# capping how many run at once: a burst of logins waits its turn instead of
+# saturating every core, and is refused only if no slot frees up in time.
+def hash_password(password, salt=None):
+    """PBKDF2-SHA256 of the password; returns (hash_hex, salt_hex)"""
+    if salt is None:
+        salt = os.urandom(32).hex()  # 64 chars
+    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), PBKDF2_ITERATIONS)
+    return key.hex(), salt
+
+
+def hash_password_pooled(password, salt=None):
+    """hash_password on the bounded hashing pool; raises AuthBusyError if it stays full"""
+    if not _hash_slots.acquire(timeout=HASH_WAIT_SECONDS):
+        raise AuthBusyError("Too many sign-ins in progress. Please try again in a moment.")
+    try:
+        return _hash_pool.submit(hash_password, password, salt).result()
+    finally:
+        _hash_slots.release()
+
+
+# --- Rate Limiting ---
+def _recent_failures(username, now):
+    failures = _failed_logins.get(username)
+    if failures is None:
+        return 0
+    while failures and failures[0] <= now - FAILED_LOGIN_WINDOW_SECONDS:
+        failures.popleft()
+    if not failures:
+        del _failed_logins[username]
+        return 0
+    return len(failures)
+
+
+def _record_failure(username):
+    with _failed_lock:
+        now = time.monotonic()
+        if username not in _failed_logins and len(_failed_logins) >= MAX_TRACKED_USERNAMES:
+            # Any name can be tried (e.g. via /auth/token): drop expired histories, then the oldest
+            for name in list(_failed_logins):
+                _recent_failures(name, now)
+            while len(_failed_logins) >= MAX_TRACKED_USERNAMES:
+                del _failed_logins[next(iter(_failed_logins))]
+        _failed_logins.setdefault(username, deque()).append(now)
+
+
+def is_rate_limited(username):
+    """True once a username has MAX_FAILED_LOGINS failures inside the window"""
+    with _failed_lock:
+        return _recent_failures(username, time.monotonic()) >= MAX_FAILED_LOGINS
+
+
+# --- Accounts ---
+def create_user_account(username, password, auth_db=AUTH_DB):
+    """Returns (success_bool, message_string)"""
+    if not username or not password:
+        return False, "Username and password required."
+
+    try:
+        if _fetch_credentials(username, auth_db):
+            return False, "Username already exists."
+
+        p_hash, salt = hash_password_pooled(password)
+        with db_connection(auth_db) as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash, salt) VALUES (?, ?, ?)",
+                (username, p_hash, salt))
+            conn.commit()
+        if cursor.rowcount == 0:
+            return False, "Username already exists."
+        return True, "Account created successfully!"
+    except AuthBusyError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Error creating account: {e}"
+
+
+def authenticate(username, password, auth_db=AUTH_DB):
+    """
+    Check a username/password pair. Usernames with too many recent failures are
+    refused before any hashing. Returns (success_bool, message_string).
+    """
+    if is_rate_limited(username):
+        return False, "Too many failed attempts. Please wait a few minutes and try again."
+    try:
+        record = _fetch_credentials(username, auth_db)
+        if record is None:
+            _record_failure(username)
+            return False, "Invalid username or password."
+
+        stored_hash, salt = record
+        with perf.span('auth.hash'):
+            input_hash, _ = hash_password_pooled(password, salt)
+    except AuthBusyError as e:
+        return False, str(e)
+    except Exception:
+        return False, "Invalid username or password."
+
+    if not hmac.compare_digest(input_hash, stored_hash):
+        _record_failure(username)
+        return False, "Invalid username or password."
+    with _failed_lock:
+        _failed_logins.pop(username, None)
+    return True, f"Welcome back, {username}!"
+
+
+def verify_login(username, password, auth_db=AUTH_DB):
+    """True if the credentials are valid"""
+    return authenticate(username, password, auth_db)[0]
+
+
+def is_admin(username):
+    """True for users listed in SHOPPULSE_ADMINS"""
+    admins = {name.strip() for name in os.environ.get(ADMINS_ENV_VAR, "").split(",")}
+    return bool(username) and username in admins
+
+
+# --- Session Tokens ---
+# A signed "kind.username.epoch.expiry.signature" token lets a reloaded page (kind
+# "app") or an HTTP API client (kind "api") prove who it is with one HMAC instead of
+# another PBKDF2 run. The epoch is the user's epoch for that kind when the token was
+# issued; revoke_sessions bumps it, so every earlier token of that kind stops working
+# while the other kind is left alone (signing out of the app keeps API clients running).
+def _signing_secret(auth_db=AUTH_DB):
+    """SHOPPULSE_SECRET if set, otherwise a random key persisted beside the users database"""
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            env_secret = os.environ.get(SECRET_ENV_VAR)
+            if env_secret:
+                _secret = env_secret.encode('utf-8')
+            else:
+                path = os.path.join(os.path.dirname(os.path.abspath(auth_db)), SECRET_FILE)
+                if not os.path.exists(path):
+                    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(fd, 'w') as f:
+                        f.write(os.urandom(32).hex())
+                with open(path) as f:
+                    _secret = f.read().strip().encode('utf-8')
+        return _secret
+
+
+def _sign(payload, auth_db):
+    digest = hmac.new(_signing_secret(auth_db), payload.encode('utf-8'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+def issue_session_token(username, ttl=None, auth_db=AUTH_DB, kind='app'):
+    """Signed `kind` token for `username`, valid for `ttl` seconds (the kind's default when None) or until revoked"""
+    ttl = SESSION_KINDS[kind][1] if ttl is None else ttl
+    payload = f"{kind}.{username}.{_fetch_session_epoch(username, kind, auth_db) or 0}.{int(time.time()) + ttl}"
+    return f"{payload}.{_sign(payload, auth_db)}"
+
+
+def verify_session_token(token, auth_db=AUTH_DB, kind='app'):
+    """Username of a valid, unexpired, unrevoked `kind` token for an existing account; otherwise None"""
+    try:
+        token_kind, rest = token.split('.', 1)
+        username, epoch, expires, signature = rest.rsplit('.', 3)
+        expired = int(expires) < time.time()
+    except (AttributeError, ValueError):
+        return None
+    if token_kind != kind or expired or \
+            not hmac.compare_digest(signature, _sign(f"{kind}.{username}.{epoch}.{expires}", auth_db)):
+        return None
+    if str(_fetch_session_epoch(username, kind, auth_db)) != epoch:
+        return None  # Unknown account, or signed out since the token was issued
+    return username
+
+
+def revoke_sessions(username, auth_db=AUTH_DB, kind='app'):
+    """Invalidate every `kind` token issued to `username` so far (signs them out on every device)"""
+    init_auth_db(auth_db)
+    column, _ = SESSION_KINDS[kind]
+    with db_connection(auth_db) as conn:
+        conn.execute(f"UPDATE users SET {column} = {column} + 1 WHERE username = ?", (username,))
+        conn.commit()
@@ -0,0 +1,150 @@
+"""
+Rolling-origin backtest of every registered forecasting model on a project database.
+
+For each cutoff, every product's history up to that day is fitted and the next
+--horizon days are forecast and scored against what actually sold. All
+(product, cutoff) training windows are stacked into one batch per model, so
+each model is fitted once per run rather than once per product and cutoff.
+
+    python backtest.py users/<name>/data.db
+    python backtest.py users/<name>/projects/<project>/data.db --horizon 14 --cutoffs 8 --step 7
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import db
+import forecasting
+import queries
+
+# --- Constants ---
+DEFAULT_HORIZON_DAYS = 14
+DEFAULT_CUTOFFS = 4
+DEFAULT_STEP_DAYS = 7
+
+
+# --- Windows ---
+def calendar_matrix(daily):
+    """
+    Daily quantities on one shared calendar: a (products, days) matrix that is 0 on
+    days without sales inside a product's first..last sale range and NaN outside it.
+    Returns (products, first_calendar_day, values).
+    """
+    products, first_day, span, dense = forecasting.daily_matrix(daily)
+    start = int(first_day.min())
+    n_days = int((first_day + span).max()) - start
+    values = np.full((len(products), n_days), np.nan)
+    columns = (first_day - start)[:, None] + np.arange(dense.shape[1])[None, :]
+    inside = ~np.isnan(dense)
+    values[np.nonzero(inside)[0], columns[inside]] = dense[inside]
+    return products, start, values
+
+
+def stacked_windows(daily, cutoffs):
+    """
+    Training rows for every (product, cutoff) window, stacked into one frame whose
+    `product_name` is the window id (cutoff_index * n_products + product_index).
+    """
+    codes, products = pd.factorize(daily['product_name'], sort=True)
+    day = daily['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    frames = []
+    for k, cutoff in enumerate(cutoffs):
+        keep = day <= cutoff
+        frames.append(pd.DataFrame({
+            'product_name': k * len(products) + codes[keep],
+            'date': daily['date'].to_numpy()[keep],
+            'quantity': daily['quantity'].to_numpy()[keep],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- Scoring ---
+def score(actual, predicted):
+    """MAPE (%) over days with non-zero actual demand, and RMSE over all days"""
+    error = predicted - actual
+    nonzero = actual != 0
+    mape = np.abs(error[nonzero] / actual[nonzero]).mean() * 100 if nonzero.any() else np.nan
+    rmse = np.sqrt(np.mean(error ** 2)) if error.size else np.nan
+    return mape, rmse
+
+
+def backtest(daily, models=None, horizon=DEFAULT_HORIZON_DAYS, n_cutoffs=DEFAULT_CUTOFFS, step=DEFAULT_STEP_DAYS,
+             min_history=forecasting.MIN_HISTORY_DAYS):
+    """
+    Scores each model on the last `n_cutoffs` origins, `step` days apart, with the
+    final cutoff `horizon` days before the latest sale. A (product, cutoff) window
+    counts when the product has `min_history` days of sales by the cutoff and
+    sales history covering the whole horizon after it.
+    Returns one row per model with windows, MAPE, RMSE, fit seconds and fit time per window.
+    """
+    models = list(forecasting.MODELS) if models is None else models
+    products, start, values = calendar_matrix(daily)
+    n_products = len(products)
+    last_cutoff = start + values.shape[1] - 1 - horizon
+    cutoffs = np.array([last_cutoff - k * step for k in range(n_cutoffs)][::-1])
+    cutoffs = cutoffs[cutoffs >= start]
+    if len(cutoffs) == 0:
+        raise ValueError(f"Not enough history for a {horizon}-day horizon.")
+
+    # Actuals for every (product, cutoff): windows of the calendar matrix, stacked to (cutoffs, products, horizon)
+    windows = sliding_window_view(values, horizon, axis=1)
+    actual = windows[:, cutoffs - start + 1].transpose(1, 0, 2).reshape(-1, horizon)
+
+    stacked = stacked_windows(daily, cutoffs)
+    window_ids = np.arange(len(cutoffs) * n_products)
+    history = forecasting.daily_matrix(stacked)
+    history_days = np.bincount(stacked['product_name'], weights=stacked['quantity'] != 0, minlength=len(window_ids))
+    usable = (history_days >= min_history) & ~np.isnan(actual).any(axis=1)
+
+    results = []
+    for name in models:
+        model = forecasting.get_model(name)
+        fit_start = time.perf_counter()
+        fits = model.fit(history)
+        fit_seconds = time.perf_counter() - fit_start
+        fits = fits.reindex(window_ids[usable])
+
+        # Forecasts start after each window's last sale, which may be before the cutoff
+        last_day = fits['last_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        gap = np.repeat(cutoffs, n_products)[usable] - last_day
+        predicted = model.forecast(fits, horizon + int(gap.max(initial=0)))
+        predicted = np.take_along_axis(predicted, gap[:, None] + np.arange(horizon)[None, :], axis=1)
+
+        mape, rmse = score(actual[usable], predicted)
+        results.append({
+            'model': name,
+            'windows': int(usable.sum()),
+            'mape_pct': mape,
+            'rmse': rmse,
+            'fit_seconds': fit_seconds,
+            'fit_us_per_window': fit_seconds / max(len(fits), 1) * 1e6,
+        })
+    return pd.DataFrame(results).set_index('model')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path", help="Project database, e.g. users/<name>/data.db")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON_DAYS, help="Days forecast after each cutoff")
+    parser.add_argument("--cutoffs", type=int, default=DEFAULT_CUTOFFS, help="Number of forecast origins")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP_DAYS, help="Days between origins")
+    parser.add_argument("--models", nargs="+", default=list(forecasting.MODELS), choices=list(forecasting.MODELS))
+    args = parser.parse_args()
+
+    db.init_db(args.db_path)
+    with db.db_connection(args.db_path) as conn:
+        daily = queries.daily_product_quantities(conn)
+    if daily.empty:
+        parser.exit(1, f"{args.db_path}: no sales to backtest\n")
+
+    results = backtest(daily, args.models, args.horizon, args.cutoffs, args.step)
+    print(f"{daily['product_name'].nunique():,} products, {args.cutoffs} cutoffs {args.step} days apart, "
+          f"{args.horizon}-day horizon")
+    print(results.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Login throughput: the old per-attempt path vs. auth_service, plus session-token reloads.
+
+Creates --users accounts in a scratch users database, then signs them in from
+--concurrency threads at once (a shift starting) and reports logins/sec and
+per-login latency. "legacy" opens a connection, runs CREATE TABLE IF NOT EXISTS
+and hashes on the calling thread for every attempt, as auth.py used to.
+
+Run from the repository root:
+    python -m benchmarks.bench_auth --users 40 --concurrency 40
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import auth_service
+
+PASSWORD = "correct horse battery staple"
+
+
+def legacy_verify_login(auth_db, username, password):
+    """verify_login as it was: fresh connection and table check per attempt, inline PBKDF2"""
+    conn = sqlite3.connect(auth_db)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            salt TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    record = conn.execute("SELECT password_hash, salt FROM users WHERE username = ?", (username,)).fetchone()
+    conn.close()
+    if not record:
+        return False
+    stored_hash, salt = record
+    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), 100000)
+    return key.hex() == stored_hash
+
+
+def run_burst(login, usernames, concurrency):
+    """Sign every user in at once from `concurrency` threads; returns (seconds, latencies)"""
+    def timed(username):
+        start = time.perf_counter()
+        ok = login(username)
+        if not ok:
+            raise RuntimeError(f"Login failed for {username}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, usernames))
+    return time.perf_counter() - start, latencies
+
+
+def report(name, elapsed, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<8} {len(latencies) / elapsed:12,.1f} {statistics.median(latencies) * 1000:10.1f} "
+          f"{p95 * 1000:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        auth_db = os.path.join(work_dir, "users.db")
+        usernames = [f"staff_{i}" for i in range(args.users)]
+        for username in usernames:
+            auth_service.create_user_account(username, PASSWORD, auth_db=auth_db)
+
+        print(f"Users: {args.users}  Concurrency: {args.concurrency}  Hash workers: {auth_service.HASH_WORKERS}")
+        print(f"{'path':<8} {'logins/sec':>12} {'p50 ms':>10} {'p95 ms':>10}")
+        report("legacy", *run_burst(lambda u: legacy_verify_login(auth_db, u, PASSWORD), usernames, args.concurrency))
+        report("service", *run_burst(lambda u: auth_service.verify_login(u, PASSWORD, auth_db=auth_db),
+                                     usernames, args.concurrency))
+
+        tokens = {u: auth_service.issue_session_token(u, auth_db=auth_db) for u in usernames}
+        report("reload", *run_burst(lambda u: auth_service.verify_session_token(tokens[u], auth_db=auth_db) == u,
+                                    usernames, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Throughput benchmark for the batch forecasting engine, per registered model.
+
+Run from the repository root:
+    python -m benchmarks.bench_forecast --products 5000 --days 365
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import forecasting
+
+
+def make_sales(n_products, n_days, seed=0):
+    """Synthetic daily sales rows: one row per product per day with a random trend"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    base = rng.uniform(10, 50, n_products)
+    trend = rng.normal(0, 0.1, n_products)
+    t = np.arange(n_days)
+    qty = base[:, None] + trend[:, None] * t[None, :] + rng.normal(0, 5, (n_products, n_days))
+    return pd.DataFrame({
+        "date": np.tile(dates.values, n_products),
+        "product_name": np.repeat([f"SKU-{i:06d}" for i in range(n_products)], n_days),
+        "quantity": np.maximum(qty, 0).round().astype(np.int64).ravel(),
+    })
+
+
+def bench_batch(df, forecast_days, model=forecasting.MODEL_NAME):
+    start = time.perf_counter()
+    table = forecasting.forecast_all_products(df, forecast_days, model=model)
+    elapsed = time.perf_counter() - start
+    return elapsed, table
+
+
+def bench_sklearn_loop(df, forecast_days, limit):
+    """The old per-product LinearRegression loop, on the first `limit` products"""
+    from sklearn.linear_model import LinearRegression
+
+    products = sorted(df["product_name"].unique())[:limit]
+    start = time.perf_counter()
+    for product in products:
+        product_data = df[df["product_name"] == product].groupby("date")["quantity"].sum().reset_index()
+        X = product_data["date"].map(pd.Timestamp.toordinal).to_frame()
+        model = LinearRegression().fit(X, product_data["quantity"])
+        last = product_data["date"].max()
+        future = [[(last + pd.Timedelta(days=d)).toordinal()] for d in range(1, forecast_days + 1)]
+        model.predict(pd.DataFrame(future, columns=X.columns))
+    return time.perf_counter() - start, len(products)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--forecast-days", type=int, default=30)
+    parser.add_argument("--models", nargs="+", default=list(forecasting.MODELS), choices=list(forecasting.MODELS))
+    parser.add_argument("--baseline-products", type=int, default=200,
+                        help="Products to time with the per-product scikit-learn loop (0 to skip)")
+    args = parser.parse_args()
+
+    df = make_sales(args.products, args.days)
+    print(f"Rows: {len(df):,}  Products: {args.products:,}  History days: {args.days}")
+
+    for model in args.models:
+        elapsed, table = bench_batch(df, args.forecast_days, model)
+        print(f"{model + ':':<18}{elapsed:8.3f}s  {args.products / elapsed:12,.0f} products/sec  "
+              f"({len(table):,} forecast rows)")
+
+    if args.baseline_products > 0:
+        try:
+            loop_elapsed, n = bench_sklearn_loop(df, args.forecast_days, args.baseline_products)
+            print(f"{'sklearn loop:':<18}{loop_elapsed:8.3f}s  {n / loop_elapsed:12,.0f} products/sec  (first {n} products)")
+        except ImportError:
+            print(f"{'sklearn loop:':<18}skipped (scikit-learn not installed)")
+
+
+if __name__ == "__main__":
+    main()
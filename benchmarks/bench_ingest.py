@@ -0,0 +1,58 @@
+"""
+Ingest throughput per upload format on the same Sample_Data.py data.
+
+Writes the generated sales to xlsx, csv, csv.gz and parquet, loads each file into
+a fresh project database with ingest.process_excel_file and reports rows/sec.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest --products 200 --days 365
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import db
+import ingest
+from Sample_Data import WRITERS, generate_sample_data, write_sample_data
+
+
+def bench_format(fmt, df, work_dir, repeat):
+    """Best-of-`repeat` load time, each run into a fresh database (first run pays reader imports)"""
+    file_path = os.path.join(work_dir, f"sales.{fmt}")
+    write_sample_data(df, file_path, fmt)
+
+    best = float("inf")
+    for i in range(repeat):
+        db_path = os.path.join(work_dir, f"{fmt.replace('.', '_')}_{i}.db")
+        db.init_db(db_path)
+
+        start = time.perf_counter()
+        success, msg, count = ingest.process_excel_file(file_path, db_path)
+        best = min(best, time.perf_counter() - start)
+        if not success:
+            raise RuntimeError(f"{fmt}: {msg}")
+    return count, best, os.path.getsize(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--formats", nargs="+", default=list(WRITERS), choices=list(WRITERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    products = [f"Product {i}" for i in range(args.products)]
+    df = generate_sample_data(products=products, n_days=args.days)
+    print(f"Rows: {len(df):,}  Products: {args.products:,}  Days: {args.days}")
+    print(f"{'format':<8} {'seconds':>9} {'rows/sec':>12} {'file MB':>9}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for fmt in args.formats:
+            count, elapsed, size = bench_format(fmt, df, work_dir, args.repeat)
+            print(f"{fmt:<8} {elapsed:9.3f} {count / elapsed:12,.0f} {size / 1e6:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Dashboard / forecast read-path benchmark: SELECT * + pandas vs. the read path the pages use.
+
+Builds a synthetic project database per row count (cached in --db-dir) and reports
+wall time and peak Python memory (tracemalloc) for both read paths, labelled with the
+sales rows the database actually holds. The databases have no columnar snapshot, so
+the sales matrix is built from one SQLite read (the cold path after a load that could
+not write one).
+
+Run from the repository root:
+    python -m benchmarks.bench_queries --rows 1000000 10000000
+"""
+import argparse
+import os
+import sqlite3
+import time
+import tracemalloc
+
+import pandas as pd
+
+import db
+import queries
+import timeseries
+
+
+def build_db(path, n_rows, n_products, rows_per_day):
+    """
+    `n_rows` synthetic transactions, `rows_per_day` per product per day, upserted into
+    one sales row per product and day. Returns the number of sales rows.
+    """
+    if not os.path.exists(path):
+        _generate(path, n_rows, n_products, rows_per_day)
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _generate(path, n_rows, n_products, rows_per_day):
+    db.init_db(path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    per_day = n_products * rows_per_day
+    cursor.execute(f'''
+        WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < {n_rows - 1})
+        INSERT INTO sales (date, product_name, quantity, revenue)
+        SELECT CAST(julianday('2015-01-01') + 0.5 AS INTEGER) + i / {per_day},
+               'SKU-' || ((i / {rows_per_day}) % {n_products}),
+               abs(random() % 50),
+               abs(random() % 5000) / 10.0
+        FROM seq
+        WHERE true
+        ON CONFLICT (product_name, date) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def legacy_path(conn, product):
+    """What the pages did before: pull every row and aggregate in pandas"""
+    df = pd.read_sql_query("SELECT * FROM sales", conn)
+    df['date'] = db.from_day_numbers(df['date'])
+    metrics = (df['quantity'].sum(), df['revenue'].sum(), df['product_name'].nunique(), df['date'].max())
+    trend = df.groupby('date')['quantity'].sum().reset_index()
+    top = df.groupby('product_name')['quantity'].sum().reset_index().sort_values('quantity').tail(10)
+    series = df[df['product_name'] == product].groupby('date')['quantity'].sum().reset_index()
+    return metrics, trend, top, series
+
+
+def matrix_path(conn, product):
+    """What the pages do now: metrics aggregated in SQLite, the rest sliced from the sales matrix"""
+    matrix = timeseries.build_matrix(conn)
+    return (
+        queries.dashboard_metrics(conn),
+        timeseries.daily_totals(matrix),
+        timeseries.top_products(matrix, limit=10),
+        timeseries.product_series(matrix, product),
+    )
+
+
+def measure(fn, conn, product):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(conn, product)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--rows-per-day", type=int, default=1,
+                        help="Transactions per product per day (summed into one sales row, "
+                             "so the database holds --rows / --rows-per-day rows)")
+    parser.add_argument("--db-dir", default="bench_dbs")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the matrix path")
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    print(f"{'rows':>12} {'path':<8} {'seconds':>9} {'peak MB':>9}")
+    for n_rows in args.rows:
+        path = os.path.join(args.db_dir, f"sales_{n_rows}_{args.products}x{args.rows_per_day}.db")
+        build_start = time.perf_counter()
+        sales_rows = build_db(path, n_rows, args.products, args.rows_per_day)
+        build_time = time.perf_counter() - build_start
+        if build_time > 1:
+            print(f"{sales_rows:>12,} built in {build_time:.1f}s")
+
+        conn = sqlite3.connect(path)
+        paths = [("matrix", matrix_path)] if args.skip_legacy else [("legacy", legacy_path), ("matrix", matrix_path)]
+        for name, fn in paths:
+            elapsed, peak = measure(fn, conn, "SKU-1")
+            print(f"{sales_rows:>12,} {name:<8} {elapsed:9.3f} {peak / 1e6:9.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold-start benchmark for the Streamlit app: time to the login form and time to
+the first rendered Dashboard, each measured in a fresh interpreter.
+
+Each sample starts a new Python process (as after a deploy), imports Streamlit,
+then times one script run of application.py under streamlit.testing. The
+Dashboard sample runs against a synthetic signed-in workspace, so its time
+includes every import and query the first page view needs.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --repeat 5 --rows 100000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(REPO_ROOT, "application.py")
+BENCH_USER = "bench"
+WATCHED_MODULES = ("pandas", "plotly.express", "forecasting", "jobs")
+
+
+def run_child(view, work_dir):
+    """One cold script run; prints {"seconds": ..., "loaded": [...], "exceptions": n} as JSON"""
+    import time
+
+    import streamlit  # noqa: F401  (the server has Streamlit loaded before any session starts)
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(work_dir)
+    sys.path.insert(0, REPO_ROOT)
+    start = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=300)
+    if view == "dashboard":
+        at.session_state["authenticated"] = True
+        at.session_state["current_user"] = BENCH_USER
+    at.run()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "loaded": [m for m in WATCHED_MODULES if m in sys.modules],
+        "exceptions": len(at.exception),
+    }))
+
+
+def prepare_workspace(work_dir, n_rows):
+    """users/<BENCH_USER>/data.db filled with synthetic sales, as the Dashboard would find it"""
+    from benchmarks.bench_queries import build_db
+
+    user_dir = os.path.join(work_dir, "users", BENCH_USER)
+    for sub in ("projects", "uploaded_files"):
+        os.makedirs(os.path.join(user_dir, sub), exist_ok=True)
+    build_db(os.path.join(user_dir, "data.db"), n_rows, n_products=max(1, n_rows // 1000), rows_per_day=1)
+
+
+def measure(view, work_dir, repeat):
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", view, work_dir],
+                             cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts per view")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic sales rows in the Dashboard project")
+    parser.add_argument("--child", nargs=2, metavar=("VIEW", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare_workspace(work_dir, args.rows)
+        for view, label in (("login", "login form"), ("dashboard", "first dashboard")):
+            samples = measure(view, work_dir, args.repeat)
+            seconds = [s["seconds"] for s in samples]
+            errors = sum(s["exceptions"] for s in samples)
+            print(f"{'time to ' + label + ':':<27}median {statistics.median(seconds):6.3f}s  "
+                  f"min {min(seconds):6.3f}s  max {max(seconds):6.3f}s"
+                  + (f"  ({errors} script exceptions)" if errors else ""))
+            print(f"{'':<27}modules loaded: {', '.join(samples[-1]['loaded']) or 'none of ' + ', '.join(WATCHED_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+End-to-end benchmark suite over the real hot paths, with machine-readable results.
+
+Generates a seeded synthetic dataset (Sample_Data.py), then times:
+  generate        vectorized data generation
+  ingest          ingest.process_excel_file into a fresh project database
+  reingest        loading the same file again (every row unchanged)
+  dashboard_cold  Dashboard aggregates with an empty data cache (sales matrix build)
+  dashboard_warm  the same call served from the data cache
+  forecast_<m>    refitting every product with model <m> and caching the forecasts
+  product_view    one product's history + forecast, as the prediction page asks for it
+  login           concurrent password sign-ins through auth_service
+
+Results are written as JSON (--json) with the commit, environment and parameters,
+so runs from different releases can be compared.
+
+Run from the repository root:
+    python -m benchmarks.suite --products 2000 --days 730 --json bench_results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import api
+import auth_service
+import cache
+import db
+import forecasting
+import ingest
+import perf
+from benchmarks.bench_auth import run_burst
+from Sample_Data import WRITERS, generate_sample_data, product_names, write_sample_data
+
+LOGIN_PASSWORD = "correct horse battery staple"
+
+
+def best_of(repeat, run, setup=None):
+    """Fastest of `repeat` runs (setup() runs untimed before each); returns (seconds, last result)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def clear_forecasts(db_path):
+    with db.db_connection(db_path) as conn:
+        conn.execute("DELETE FROM forecast_cache")
+        conn.commit()
+    cache.invalidate(db_path)
+
+
+def run_suite(args, work_dir):
+    results = {}
+
+    def record(name, seconds, **metrics):
+        results[name] = {"seconds": round(seconds, 6), **metrics}
+        extra = "  ".join(f"{k} {v:,}" if isinstance(v, int) else f"{k} {v:,.1f}" for k, v in metrics.items())
+        print(f"{name:<28}{seconds:10.3f}s  {extra}", flush=True)
+
+    # --- Data ---
+    products = product_names(args.products)
+    seconds, df = best_of(1, lambda: generate_sample_data(products, args.days, "2022-01-01", args.seed,
+                                                          args.weekly, args.yearly))
+    rows = len(df)
+    record("generate", seconds, rows=rows, rows_per_sec=rows / seconds)
+    data_file = os.path.join(work_dir, f"sales.{args.format}")
+    write_sample_data(df, data_file, args.format)
+    del df
+
+    # --- Ingest ---
+    db_paths = iter(os.path.join(work_dir, f"ingest_{i}.db") for i in range(args.repeat))
+    db_path = None
+
+    def fresh_db():
+        nonlocal db_path
+        db_path = next(db_paths)
+        db.init_db(db_path)
+
+    seconds, (ok, message, count) = best_of(args.repeat, lambda: ingest.process_excel_file(data_file, db_path),
+                                            setup=fresh_db)
+    if not ok:
+        raise RuntimeError(message)
+    record("ingest", seconds, rows=count, rows_per_sec=count / seconds, file_mb=os.path.getsize(data_file) / 1e6)
+    seconds, _ = best_of(1, lambda: ingest.process_excel_file(data_file, db_path))
+    record("reingest", seconds, rows=count, rows_per_sec=count / seconds)
+
+    # --- Dashboard ---
+    seconds, view = best_of(args.repeat, lambda: api.dashboard(db_path), setup=lambda: cache.invalidate(db_path))
+    record("dashboard_cold", seconds, products=view['active_products'], days=len(view['trend']))
+    seconds, _ = best_of(args.repeat, lambda: api.dashboard(db_path))
+    record("dashboard_warm", seconds)
+
+    # --- Forecasting ---
+    for model in args.models:
+        seconds, forecasts = best_of(args.repeat, lambda: api.load_forecasts(db_path, model),
+                                     setup=lambda: clear_forecasts(db_path))
+        record(f"forecast_{model}", seconds, products=len(forecasts), products_per_sec=len(forecasts) / seconds)
+
+    product = products[len(products) // 2]
+    seconds, _ = best_of(args.repeat, lambda: api.product_forecast(db_path, product, 30),
+                         setup=lambda: cache.invalidate(db_path))
+    record("product_view", seconds)
+
+    # --- Login ---
+    if args.logins > 0:
+        auth_db = os.path.join(work_dir, "users.db")
+        usernames = [f"user{i}" for i in range(args.logins)]
+        for username in usernames:
+            auth_service.create_user_account(username, LOGIN_PASSWORD, auth_db)
+        seconds, latencies = run_burst(lambda u: auth_service.verify_login(u, LOGIN_PASSWORD, auth_db),
+                                       usernames, args.logins)
+        record("login", seconds, logins=len(usernames), logins_per_sec=len(usernames) / seconds,
+               p50_ms=float(np.median(latencies)) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weekly", type=float, default=0.3, help="Weekly seasonality amplitude")
+    parser.add_argument("--yearly", type=float, default=0.2, help="Yearly seasonality amplitude")
+    parser.add_argument("--format", default="parquet", choices=list(WRITERS), help="Upload file format to ingest")
+    parser.add_argument("--models", nargs="+", default=list(forecasting.MODELS), choices=list(forecasting.MODELS))
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent sign-ins to time (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    print(f"Rows: {args.products * args.days:,}  Products: {args.products:,}  Days: {args.days}  "
+          f"Format: {args.format}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        perf.METRICS_LOG = os.path.join(work_dir, "metrics.jsonl")  # Keep benchmark spans out of the app's log
+        results = run_suite(args, work_dir)
+
+    report = {
+        "suite": "shoppulse",
+        "environment": environment(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "json"},
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
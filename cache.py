@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import forecast_cache
+from db import database_path
+
+# --- Constants ---
+CACHE_MB_ENV_VAR = "SHOPPULSE_CACHE_MB"
+CACHE_MAX_BYTES = int(float(os.environ.get(CACHE_MB_ENV_VAR, 256)) * 1024 * 1024)
+
+# --- In-Process Data Cache ---
+# Derived project data (sales matrix, dashboard aggregates, cached forecasts) shared by
+# every session in this process. Entries are keyed by (database path, data version,
+# name, args): ingest and clear bump the project's data version, so a rerun after new
+# data misses and recomputes, while navigation between pages hits. Memory is bounded
+# by CACHE_MAX_BYTES with least-recently-used eviction. Cached values are shared
+# across sessions and must be treated as read-only.
+_entries = OrderedDict()  # key -> (value, nbytes)
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+
+def _nbytes(value):
+    """Approximate memory held by a cached value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _store(key, value):
+    size = _nbytes(value)
+    path, version = key[0], key[1]
+    with _lock:
+        # Entries from an older data version of this project can never hit again
+        for old in [k for k in _entries if k[0] == path and k[1] != version]:
+            _stats['bytes'] -= _entries.pop(old)[1]
+        previous = _entries.pop(key, None)
+        if previous is not None:
+            _stats['bytes'] -= previous[1]
+        if size > CACHE_MAX_BYTES:
+            return
+        _entries[key] = (value, size)
+        _stats['bytes'] += size
+        while _stats['bytes'] > CACHE_MAX_BYTES:
+            _, (_, evicted) = _entries.popitem(last=False)
+            _stats['bytes'] -= evicted
+            _stats['evictions'] += 1
+
+
+def memoize(conn, name, compute, *args):
+    """
+    compute(conn, *args) for the connection's project, reused until its data version changes.
+    `name` identifies the computation; `args` must be hashable.
+    """
+    key = (database_path(conn), forecast_cache.get_data_version(conn), name, args)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return entry[0]
+        _stats['misses'] += 1
+
+    value = compute(conn, *args)
+    _store(key, value)
+    return value
+
+
+def invalidate(db_path=None):
+    """Drop every entry for one project database (all projects when None)"""
+    path = None if db_path is None else os.path.abspath(db_path)
+    with _lock:
+        for key in [k for k in _entries if path is None or k[0] == path]:
+            _stats['bytes'] -= _entries.pop(key)[1]
+
+
+def cache_stats():
+    """Snapshot of hit/miss/eviction counters with current entries and bytes held"""
+    with _lock:
+        stats = dict(_stats, entries=len(_entries), max_bytes=CACHE_MAX_BYTES)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
@@ -0,0 +1,198 @@
+"""
+Bulk ingest and batch forecasting for every project, for nightly jobs.
+
+Exports are picked up from EXPORT_DIR/<user>/<project>/ (use "default" for a user's
+Default Project; missing projects are created). Forecasts are written to
+OUT_DIR/<user>/<project>/forecast_<model>_<days>d.csv. Each project is one task
+in a process pool, so work scales with cores while loads into the same database
+stay in order. Files whose content is already loaded are skipped.
+
+    python cli.py ingest exports/
+    python cli.py forecast forecasts/ --days 30 --models linear_trend holt_winters
+    python cli.py nightly exports/ forecasts/ --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import api
+import forecasting
+import workspace
+from forecast_cache import CACHE_HORIZON_DAYS
+from ingest import is_supported_file
+from uploads import SKIPPED_PREFIX
+
+# --- Constants ---
+DEFAULT_PROJECT_DIR = "default"  # Export / output folder name of a user's Default Project
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+ProjectTask = namedtuple('ProjectTask', ['user', 'project', 'files', 'out_dir', 'days', 'models', 'mode',
+                                         'users_dir'])
+
+
+# --- Discovery ---
+def _project_dir_name(project):
+    return DEFAULT_PROJECT_DIR if project == workspace.DEFAULT_PROJECT else project
+
+
+def find_exports(export_dir, users_dir=workspace.USERS_DIR):
+    """
+    {(user, project): [files]} for EXPORT_DIR/<user>/<project>/<file>. Users without a
+    workspace are reported and skipped; projects are resolved to their sanitized names.
+    """
+    known_users = set(workspace.get_users(users_dir))
+    exports = {}
+    for user in sorted(os.listdir(export_dir)):
+        user_dir = os.path.join(export_dir, user)
+        if not os.path.isdir(user_dir):
+            continue
+        if user not in known_users:
+            print(f"{user}: no such user under {users_dir}, skipped", file=sys.stderr)
+            continue
+        for folder in sorted(os.listdir(user_dir)):
+            project_dir = os.path.join(user_dir, folder)
+            files = sorted(os.path.join(project_dir, f) for f in os.listdir(project_dir)
+                           if is_supported_file(f)) if os.path.isdir(project_dir) else []
+            if files:
+                project = workspace.DEFAULT_PROJECT if folder == DEFAULT_PROJECT_DIR else \
+                    workspace.safe_project_name(folder)
+                exports.setdefault((user, project), []).extend(files)
+    return exports
+
+
+def all_projects(users_dir=workspace.USERS_DIR):
+    """Every (user, project) pair under `users_dir`"""
+    return [(user, project) for user in sorted(workspace.get_users(users_dir))
+            for project in workspace.list_projects(user, users_dir)]
+
+
+# --- Per-Project Work ---
+def run_project(task):
+    """
+    Ingest the task's files, then refresh and write each model's forecast (when out_dir is set).
+    Runs in a worker process. Returns a summary dict with per-stage seconds.
+    """
+    summary = {'user': task.user, 'project': task.project, 'files': len(task.files), 'rows': 0, 'skipped': 0,
+               'products': 0, 'errors': [], 'ingest_s': 0.0, 'forecast_s': 0.0, 'write_s': 0.0}
+    try:
+        if task.project == workspace.DEFAULT_PROJECT:
+            db_path, upload_dir = workspace.open_project(task.user, task.project, task.users_dir)
+        else:
+            _, db_path, upload_dir = workspace.create_project(task.user, task.project, task.users_dir)
+
+        start = time.perf_counter()
+        for path in task.files:
+            # Hashed and copied in blocks; the chunked loader then streams it
+            success, message, rows = api.ingest_path(db_path, upload_dir, os.path.basename(path), path, task.mode)
+            if not success:
+                summary['errors'].append(f"{os.path.basename(path)}: {message}")
+            elif message.startswith(SKIPPED_PREFIX):
+                summary['skipped'] += 1
+            else:
+                summary['rows'] += rows
+        summary['ingest_s'] = time.perf_counter() - start
+
+        if task.out_dir is None:
+            return summary
+        out_dir = os.path.join(task.out_dir, task.user, _project_dir_name(task.project))
+        os.makedirs(out_dir, exist_ok=True)
+        for model in task.models:
+            start = time.perf_counter()
+            table = api.forecast_table(db_path, task.days, model)
+            summary['forecast_s'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            table.to_csv(os.path.join(out_dir, f"forecast_{model}_{task.days}d.csv"), index=False,
+                         date_format='%Y-%m-%d')
+            summary['write_s'] += time.perf_counter() - start
+            summary['products'] = table['product_name'].nunique()
+    except Exception as e:
+        summary['errors'].append(str(e))
+    return summary
+
+
+def run_all(tasks, workers=DEFAULT_WORKERS):
+    """Run project tasks across a process pool; returns their summaries as a DataFrame"""
+    results = []
+    if workers <= 1 or len(tasks) <= 1:
+        results = [run_project(task) for task in tasks]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+            for future in as_completed([pool.submit(run_project, task) for task in tasks]):
+                results.append(future.result())
+    columns = ['user', 'project', 'files', 'rows', 'skipped', 'products', 'ingest_s', 'forecast_s', 'write_s',
+               'errors']
+    return pd.DataFrame(results, columns=columns).sort_values(['user', 'project'], ignore_index=True)
+
+
+# --- Reporting ---
+def report(results, wall_seconds):
+    """Print one line per project plus per-stage totals; returns the number of failed projects"""
+    if results.empty:
+        print("No projects to process.")
+        return 0
+    table = results.drop(columns='errors').set_index(['user', 'project'])
+    print(table.to_string(float_format=lambda v: f"{v:,.2f}"))
+    stages = results[['ingest_s', 'forecast_s', 'write_s']].sum()
+    print(f"\n{len(results)} projects in {wall_seconds:,.2f}s wall  "
+          f"(stage totals: ingest {stages['ingest_s']:,.2f}s, forecast {stages['forecast_s']:,.2f}s, "
+          f"write {stages['write_s']:,.2f}s)")
+
+    failed = results[results['errors'].str.len() > 0]
+    for row in failed.itertuples():
+        for error in row.errors:
+            print(f"ERROR {row.user}/{row.project}: {error}", file=sys.stderr)
+    return len(failed)
+
+
+# --- Entry Point ---
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--users-dir", default=workspace.USERS_DIR, help="Workspace root (default: users)")
+    common.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Projects processed in parallel")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_cmd = commands.add_parser("ingest", parents=[common], help="Load EXPORT_DIR/<user>/<project>/ files")
+    forecast_cmd = commands.add_parser("forecast", parents=[common], help="Write forecasts for every project to OUT_DIR")
+    nightly_cmd = commands.add_parser("nightly", parents=[common], help="ingest, then forecast the projects")
+    for cmd in (ingest_cmd, nightly_cmd):
+        cmd.add_argument("export_dir")
+        cmd.add_argument("--mode", default="Append", choices=["Append", "Replace Database"])
+    for cmd in (forecast_cmd, nightly_cmd):
+        cmd.add_argument("out_dir")
+        cmd.add_argument("--days", type=int, default=30, choices=range(1, CACHE_HORIZON_DAYS + 1),
+                         metavar=f"1-{CACHE_HORIZON_DAYS}")
+        cmd.add_argument("--models", nargs="+", default=[forecasting.MODEL_NAME], choices=list(forecasting.MODELS))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    exports = find_exports(args.export_dir, args.users_dir) if args.command != "forecast" else {}
+    if args.command == "nightly":
+        # Every project gets a forecast, whether or not it had new exports tonight
+        projects = sorted(set(exports) | set(all_projects(args.users_dir)))
+    elif args.command == "forecast":
+        projects = all_projects(args.users_dir)
+    else:
+        projects = sorted(exports)
+    discover_s = time.perf_counter() - start
+
+    tasks = [ProjectTask(user, project, exports.get((user, project), []), getattr(args, 'out_dir', None),
+                         getattr(args, 'days', None), getattr(args, 'models', []), getattr(args, 'mode', "Append"),
+                         args.users_dir)
+             for user, project in projects]
+    print(f"Found {len(tasks)} projects ({sum(len(t.files) for t in tasks)} export files) in {discover_s:,.2f}s")
+    results = run_all(tasks, args.workers)
+    return 1 if report(results, time.perf_counter() - start) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# --- Constants ---
+JDN_UNIX_EPOCH = 2440588  # Julian day number of 1970-01-01
+
+# Applied to every pooled connection. WAL lets readers in other processes proceed
+# while an upload writes; NORMAL sync is durable across app crashes under WAL.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",    # 64 MiB page cache (negative = KiB)
+    "PRAGMA mmap_size=268435456",  # 256 MiB memory-mapped reads
+    "PRAGMA busy_timeout=30000",
+)
+
+
+# --- Date Storage ---
+# Sales dates are stored as integer Julian day numbers: compact, index-friendly,
+# compared as integers, and still readable in SQL via date(<column>).
+# pandas is imported on first use so the users database (login) can open without it.
+def to_day_numbers(dates):
+    """Datetime-like Series/array -> int64 Julian day numbers; raises ValueError on missing dates (NaT)"""
+    import pandas as pd
+
+    values = pd.to_datetime(dates).values.astype('datetime64[D]')
+    if pd.isna(values).any():
+        raise ValueError("Missing dates cannot be stored as day numbers.")
+    days = values.astype('int64')
+    return days + JDN_UNIX_EPOCH
+
+
+def from_day_numbers(day_numbers):
+    """Julian day numbers (array-like or scalar) -> datetimes"""
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_scalar(day_numbers):
+        return pd.Timestamp(int(day_numbers) - JDN_UNIX_EPOCH, unit='D')
+    days = np.asarray(day_numbers, dtype='int64') - JDN_UNIX_EPOCH
+    return pd.to_datetime(days, unit='D')
+
+
+# --- Connection Management ---
+# One connection per database path per process, opened on first use and reused by
+# every rerun and session. Streamlit runs sessions on separate threads, so each
+# pooled connection carries a lock and is only handed out through db_connection().
+_pool = {}
+_pool_lock = threading.Lock()
+_initialized = set()
+
+
+def _reset_pool_lock():
+    # A forked child (e.g. an ingest worker) may inherit the lock mid-acquire.
+    # Inherited connections stay in _pool untouched; keys carry the pid, so the
+    # child opens its own.
+    global _pool_lock
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_lock)
+
+
+def _pool_key(db_path):
+    return os.getpid(), os.path.abspath(db_path)
+
+
+def _open_connection(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def db_connection(db_path):
+    """
+    Borrow the pooled connection for `db_path`, holding its lock for the block.
+    Callers commit or roll back themselves and must not close it. A block that raises
+    with a transaction still open is rolled back, so the shared connection never
+    keeps holding locks (or refuses the next BEGIN) after a failed write.
+    """
+    key = _pool_key(db_path)
+    with _pool_lock:
+        entry = _pool.get(key)
+        if entry is None:
+            entry = _pool[key] = (_open_connection(db_path), threading.RLock())
+    conn, lock = entry
+    with lock:
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+def database_path(conn):
+    """Absolute path of the file behind a connection's main database"""
+    return os.path.abspath(conn.execute("PRAGMA database_list").fetchone()[2])
+
+
+def close_db_connection(db_path):
+    """Drop the pooled connection for `db_path` (e.g. before deleting the file)"""
+    key = _pool_key(db_path)
+    with _pool_lock:
+        entry = _pool.pop(key, None)
+        _initialized.discard(key)
+    if entry is not None:
+        conn, lock = entry
+        with lock:
+            conn.close()
+
+
+def init_db(db_path):
+    """
+    Ensure the schema in the specified database exists and is at the latest version.
+    Runs once per path per process; later calls are a set lookup.
+    """
+    key = _pool_key(db_path)
+    if key in _initialized and os.path.exists(db_path):
+        return
+    if key in _initialized:
+        close_db_connection(db_path)  # File was removed underneath us; start over
+    with db_connection(db_path) as conn:
+        migrate(conn)
+    _initialized.add(key)
+
+
+# --- Schema Migrations ---
+# Each step upgrades the schema by one version inside its own transaction.
+# The version lives in PRAGMA user_version so existing users/*/data.db and
+# project databases are upgraded in place the next time they are opened.
+def _migrate_v1_base_schema(cursor):
+    """Tables as they existed before versioning (text dates, no indexes)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_product_sales (
+            date TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (date, product_name)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_versions (
+            product_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS forecast_cache (
+            product_name TEXT NOT NULL,
+            model TEXT NOT NULL,
+            data_version INTEGER NOT NULL,
+            n_days INTEGER NOT NULL,
+            last_date TEXT NOT NULL,
+            history_mean REAL NOT NULL,
+            predictions BLOB NOT NULL,
+            PRIMARY KEY (product_name, model)
+        )
+    ''')
+
+    # daily_product_sales is only kept for version 2 to convert; version 5 drops it
+
+
+def _migrate_v2_day_numbers(cursor):
+    """Integer Julian-day dates plus (product_name, date) indexing on sales and the rollup"""
+    cursor.execute('''
+        CREATE TABLE sales_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO sales_v2 (id, date, product_name, quantity, revenue)
+        SELECT id, CAST(julianday(date) + 0.5 AS INTEGER), product_name, quantity, revenue
+        FROM sales
+    ''')
+    cursor.execute("DROP TABLE sales")
+    cursor.execute("ALTER TABLE sales_v2 RENAME TO sales")
+    cursor.execute("CREATE INDEX idx_sales_product_date ON sales (product_name, date)")
+
+    cursor.execute('''
+        CREATE TABLE daily_product_sales_v2 (
+            date INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (product_name, date)
+        ) WITHOUT ROWID
+    ''')
+    # Text keys such as '2024-01-01' and '2024-01-01 00:00:00' fall on the same day: merge them
+    cursor.execute('''
+        INSERT INTO daily_product_sales_v2 (date, product_name, quantity, revenue)
+        SELECT CAST(julianday(date) + 0.5 AS INTEGER) AS day, product_name, SUM(quantity), SUM(revenue)
+        FROM daily_product_sales
+        GROUP BY product_name, day
+    ''')
+    cursor.execute("DROP TABLE daily_product_sales")
+    cursor.execute("ALTER TABLE daily_product_sales_v2 RENAME TO daily_product_sales")
+
+
+def _migrate_v3_unique_sales_keys(cursor):
+    """
+    One sales row per (product_name, date) so loads can upsert. Existing duplicate
+    rows are merged into the oldest id with their quantities and revenue summed,
+    which leaves every daily total unchanged. Missing revenue becomes 0, as every
+    load already writes it, so re-importing the same rows finds them unchanged.
+    """
+    cursor.execute('''
+        CREATE TABLE sales_v3 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL,
+            UNIQUE (product_name, date)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO sales_v3 (id, date, product_name, quantity, revenue)
+        SELECT MIN(id), date, product_name, SUM(quantity), SUM(COALESCE(revenue, 0))
+        FROM sales
+        GROUP BY product_name, date
+    ''')
+    cursor.execute("DROP TABLE sales")  # Also drops idx_sales_product_date; the UNIQUE index replaces it
+    cursor.execute("ALTER TABLE sales_v3 RENAME TO sales")
+
+
+def _migrate_v4_upload_manifest(cursor):
+    """
+    Content-addressed manifest of the files saved for a project, keyed by SHA-256,
+    with the outcome of the last time each one was loaded into the database.
+    """
+    cursor.execute('''
+        CREATE TABLE uploads (
+            sha256 TEXT PRIMARY KEY,
+            original_name TEXT NOT NULL,
+            stored_name TEXT NOT NULL UNIQUE,
+            size INTEGER NOT NULL,
+            uploaded_at INTEGER NOT NULL,
+            loaded_at INTEGER,
+            loaded_mode TEXT,
+            loaded_version INTEGER,
+            rows INTEGER,
+            inserted INTEGER,
+            updated INTEGER,
+            unchanged INTEGER
+        )
+    ''')
+
+
+def _migrate_v5_drop_rollup(cursor):
+    """
+    With one sales row per (product_name, date) since version 3, the daily_product_sales
+    rollup held exactly the same rows, so every load stored its data twice. Reads now
+    use sales directly; its UNIQUE (product_name, date) index serves the ordered scans.
+    """
+    cursor.execute("UPDATE sales SET revenue = 0 WHERE revenue IS NULL")  # The rollup counted it as 0
+    cursor.execute("DROP TABLE IF EXISTS daily_product_sales")
+
+
+MIGRATIONS = [
+    (1, _migrate_v1_base_schema),
+    (2, _migrate_v2_day_numbers),
+    (3, _migrate_v3_unique_sales_keys),
+    (4, _migrate_v4_upload_manifest),
+    (5, _migrate_v5_drop_rollup),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """Apply every pending migration; returns the resulting schema version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in MIGRATIONS:
+        if version >= target:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+    return version
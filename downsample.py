@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+
+# --- Constants ---
+CHART_POINTS_ENV_VAR = "SHOPPULSE_CHART_POINTS"
+MAX_CHART_POINTS = int(os.environ.get(CHART_POINTS_ENV_VAR, 1000))  # Points per chart series sent to the browser
+MIN_CHART_POINTS = 3  # Smallest budget that keeps more than a series' first and last points
+MINMAX_RATIO = 8  # Beyond this many source points per kept point, min/max buckets replace LTTB
+RESOLUTIONS = {"Daily": None, "Weekly": "W-MON", "Monthly": "MS"}  # Periods are labelled by their first day
+
+
+# --- Resampling ---
+def resample(frame, resolution="Daily", how="sum", x='date', y='quantity'):
+    """(x, y) frame summed (or averaged, how="mean") per week or month; Daily returns it unchanged"""
+    rule = RESOLUTIONS[resolution]
+    if rule is None or frame.empty:
+        return frame[[x, y]]
+    return frame.resample(rule, on=x, label='left', closed='left')[y].agg(how).reset_index()
+
+
+# --- Downsampling ---
+# Both methods return the sorted positions of the points to keep, always including
+# the first and last so the chart's range does not change. A budget below
+# MIN_CHART_POINTS keeps only those two.
+def _ends(n):
+    return np.array([0, n - 1]) if n > 1 else np.arange(n)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keeps the points that best preserve the line's visual shape"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < MIN_CHART_POINTS:
+        return _ends(n)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x, next_y = np.append(mean_x[1:], x[-1]), np.append(mean_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the area of the triangle (previous kept point, candidate, next bucket's mean)
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, n_out):
+    """Min/max bucketing: each bucket keeps its lowest and highest point, so spikes survive heavy reduction"""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    if n_out < MIN_CHART_POINTS:
+        return _ends(n)
+    buckets = max((n_out - 2) // 2, 1)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    positions = starts[:, None] + np.arange(np.diff(edges).max())[None, :]
+    inside = positions < edges[1:, None]
+    values = y[np.minimum(positions, n - 1)]
+    low = np.where(inside, values, np.inf).argmin(axis=1)
+    high = np.where(inside, values, -np.inf).argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], starts + low, starts + high]))
+
+
+def downsample(frame, max_points=MAX_CHART_POINTS, x='date', y='quantity'):
+    """
+    At most about max_points rows of a sorted (x, y) frame. Ranges up to MINMAX_RATIO
+    times over budget use LTTB; denser ones use min/max buckets, where one point per
+    bucket would drop peaks and troughs.
+    """
+    n = len(frame)
+    if n <= max_points:
+        return frame
+    ys = frame[y].to_numpy(dtype=np.float64)
+    if n <= MINMAX_RATIO * max_points:
+        xs = frame[x].to_numpy()
+        xs = xs.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(xs.dtype, np.datetime64) else xs
+        keep = lttb(xs.astype(np.float64), ys, max_points)
+    else:
+        keep = minmax(ys, max_points)
+    return frame.iloc[keep]
+
+
+def chart_series(frame, resolution="Daily", max_points=MAX_CHART_POINTS, how="sum", x='date', y='quantity'):
+    """Resample to the chosen resolution, then downsample: what a chart should plot"""
+    return downsample(resample(frame, resolution, how, x, y), max_points, x, y)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+import forecasting
+import perf
+import timeseries
+
+# --- Constants ---
+CACHE_HORIZON_DAYS = 60  # Longest horizon the prediction page offers; shorter ones are slices
+
+
+# --- Data Version Stamp ---
+def get_data_version(conn):
+    """Current project-wide data-version stamp"""
+    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(cursor, products=None):
+    """
+    Advances the data-version stamp inside the caller's transaction.
+    `products=None` marks every product as changed (replace / clear); otherwise
+    only the listed products are stamped and only their forecasts go stale.
+    Returns the new version.
+    """
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    version = cursor.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+
+    if products is None:
+        cursor.execute("DELETE FROM product_versions")
+        cursor.execute("DELETE FROM forecast_cache")
+    else:
+        cursor.executemany('''
+            INSERT INTO product_versions (product_name, version) VALUES (?, ?)
+            ON CONFLICT(product_name) DO UPDATE SET version = excluded.version
+        ''', [(p, version) for p in products])
+    return version
+
+
+# --- Cache Maintenance ---
+def stale_products(conn, model=forecasting.MODEL_NAME):
+    """Products whose cached forecast is missing or older than their data"""
+    rows = conn.execute('''
+        SELECT p.product_name
+        FROM (SELECT DISTINCT product_name FROM sales) p
+        LEFT JOIN product_versions v ON v.product_name = p.product_name
+        LEFT JOIN forecast_cache c ON c.product_name = p.product_name AND c.model = ?
+        WHERE c.data_version IS NULL OR c.data_version != COALESCE(v.version, 0)
+    ''', (model,)).fetchall()
+    return [r[0] for r in rows]
+
+
+def refresh_forecasts(conn, model=forecasting.MODEL_NAME):
+    """
+    Refits only the stale products (in one batch) and writes their forecasts to the cache.
+    Returns the number of products refitted.
+    """
+    stale = stale_products(conn, model)
+    if not stale:
+        return 0
+
+    matrix = timeseries.load_matrix(conn)
+    history = timeseries.product_history(matrix, None if len(stale) == len(matrix.products) else stale)
+
+    forecaster = forecasting.get_model(model)
+    with perf.span('forecast.fit', model=model, rows=len(history.products), bytes=history.values.nbytes):
+        fits = forecaster.fit(history)
+        predicted = forecaster.forecast(fits, CACHE_HORIZON_DAYS)
+
+    versions = dict(conn.execute("SELECT product_name, version FROM product_versions").fetchall())
+    usable = fits['n_days'].to_numpy() >= forecasting.MIN_HISTORY_DAYS
+    empty = np.empty(0, dtype=np.float64).tobytes()
+
+    rows = [
+        (
+            product,
+            model,
+            versions.get(product, 0),
+            int(n_days),
+            last_date.strftime('%Y-%m-%d'),
+            float(history_mean),
+            predicted[i].astype(np.float64).tobytes() if usable[i] else empty,
+        )
+        for i, (product, n_days, last_date, history_mean) in enumerate(
+            zip(fits.index, fits['n_days'], fits['last_date'], fits['history_mean']))
+    ]
+    with perf.span('forecast.write', rows=len(rows)):
+        conn.executemany('''
+            INSERT OR REPLACE INTO forecast_cache
+                (product_name, model, data_version, n_days, last_date, history_mean, predictions)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    return len(rows)
+
+
+# --- Cache Reads ---
+def load_forecasts(conn, model=forecasting.MODEL_NAME):
+    """
+    Returns the cached forecasts for every product, refitting stale products first.
+    The result is indexed by product_name with n_days, last_date, history_mean and
+    a `predictions` column holding CACHE_HORIZON_DAYS values (empty when history is too short).
+    """
+    refresh_forecasts(conn, model)
+    with perf.span('forecast.read', model=model) as s:
+        cached = pd.read_sql_query('''
+            SELECT product_name, n_days, last_date, history_mean, predictions
+            FROM forecast_cache WHERE model = ?
+            ORDER BY product_name
+        ''', conn, params=(model,), index_col='product_name')
+        cached['last_date'] = pd.to_datetime(cached['last_date'])
+        cached['predictions'] = [np.frombuffer(b, dtype=np.float64) for b in cached['predictions']]
+        s.update(rows=len(cached), bytes=sum(p.nbytes for p in cached['predictions']))
+    return cached
+
+
+def cached_forecast_table(cached, forecast_days, min_history=forecasting.MIN_HISTORY_DAYS):
+    """Tidy (product_name, date, predicted_quantity) table sliced from cached forecasts"""
+    forecast_days = min(forecast_days, CACHE_HORIZON_DAYS)
+    usable = cached[cached['n_days'] >= min_history]
+    if usable.empty:
+        return forecasting.tidy_forecast([], pd.Series(dtype='datetime64[ns]'), np.empty((0, forecast_days)))
+
+    predicted = np.vstack(usable['predictions'].to_numpy())[:, :forecast_days]
+    return forecasting.tidy_forecast(usable.index, usable['last_date'], predicted)
@@ -0,0 +1,290 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# --- Constants ---
+MODEL_NAME = "linear_trend"  # Default model
+MIN_HISTORY_DAYS = 5  # Same threshold the prediction page has always used
+SEASON_DAYS = 7  # Weekly seasonality
+MOVING_AVERAGE_DAYS = 7
+SES_ALPHA = 0.3  # Simple exponential smoothing: level weight
+HOLT_WINTERS_ALPHA = 0.3  # Level
+HOLT_WINTERS_BETA = 0.05  # Trend
+HOLT_WINTERS_GAMMA = 0.2  # Day-of-week seasonality
+HOLT_WINTERS_DAMPING = 0.98  # Damped trend, so long horizons do not run away
+
+
+# --- Data Preparation ---
+def daily_product_totals(df):
+    """Collapse raw sales rows into one (product_name, date, quantity) row per product per day"""
+    daily = df.groupby(['product_name', 'date'], sort=True)['quantity'].sum().reset_index()
+    return daily
+
+
+def _day_numbers(dates):
+    """Convert a datetime Series into integer day numbers (days since 1970-01-01)"""
+    return pd.to_datetime(dates).values.astype('datetime64[D]').astype(np.int64)
+
+
+# --- Dense Daily Histories ---
+# Every model fits a DailyHistory: one row per product, left-aligned at its first
+# sale date. Days without sales inside a product's range are 0; cells past its
+# last date are NaN. `span` is each row's length in days.
+DailyHistory = namedtuple('DailyHistory', ['products', 'first_day', 'span', 'values'])
+
+
+def daily_matrix(daily):
+    """Lays tidy (product_name, date, quantity) daily totals out as a DailyHistory"""
+    codes, products = pd.factorize(daily['product_name'], sort=True)
+    day = _day_numbers(daily['date'])
+    y = daily['quantity'].to_numpy(dtype=np.float64)
+    n_groups = len(products)
+
+    first_day = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first_day, codes, day)
+    last_day = np.full(n_groups, np.iinfo(np.int64).min)
+    np.maximum.at(last_day, codes, day)
+    span = last_day - first_day + 1
+
+    values = np.zeros((n_groups, int(span.max()) if n_groups else 0))
+    values[np.arange(values.shape[1])[None, :] >= span[:, None]] = np.nan
+    np.add.at(values, (codes, day - first_day[codes]), y)
+    return DailyHistory(products, first_day, span, values)
+
+
+def _history_frame(history, **params):
+    """
+    Fits frame with the columns every model shares plus `params`: n_days (days with
+    sales), last_date and history_mean (mean daily demand over the product's range).
+    """
+    values = np.nan_to_num(history.values)
+    fits = pd.DataFrame({
+        'n_days': np.count_nonzero(values, axis=1).astype(np.int64),
+        'last_date': pd.to_datetime(history.first_day + history.span - 1, unit='D'),
+        'history_mean': values.sum(axis=1) / history.span,
+        **params,
+    }, index=pd.Index(history.products, name='product_name'))
+    return fits
+
+
+# --- Batch Trend Fitting ---
+def fit_trends(history):
+    """
+    Fits a least-squares trend line (quantity ~ day) for every product at once,
+    over each product's full zero-filled range, using closed-form row sums
+    instead of one estimator per product.
+    Returns a DataFrame indexed by product_name with slope, intercept, n_days,
+    last_date and history_mean columns (intercept is at day number 0).
+    """
+    if len(history.products) == 0:
+        return _empty_fits('slope', 'intercept')
+
+    values, span = history.values, history.span.astype(np.float64)
+    present = ~np.isnan(values)
+    x = np.arange(values.shape[1], dtype=np.float64)[None, :]
+
+    # Offsets from each product's first day; centre x before squaring to keep the sums stable
+    mean_x = (span - 1) / 2
+    mean_y = np.where(present, values, 0.0).sum(axis=1) / span
+    xc = np.where(present, x - mean_x[:, None], 0.0)
+    sxx = (xc * xc).sum(axis=1)
+    sxy = (xc * np.where(present, values - mean_y[:, None], 0.0)).sum(axis=1)
+
+    slope = np.divide(sxy, sxx, out=np.zeros(len(span)), where=sxx > 0)
+    intercept = mean_y - slope * (mean_x + history.first_day)
+    return _history_frame(history, slope=slope, intercept=intercept)
+
+
+def forecast_matrix(fits, forecast_days):
+    """
+    Evaluates every fitted trend for the next `forecast_days` days.
+    Returns a (products, days) array aligned with the rows of `fits`, clipped at zero.
+    """
+    steps = np.arange(1, forecast_days + 1, dtype=np.int64)
+    last_day = _day_numbers(fits['last_date'])
+    future_day = last_day[:, None] + steps[None, :]
+    predicted = fits['intercept'].to_numpy()[:, None] + fits['slope'].to_numpy()[:, None] * future_day
+    np.maximum(predicted, 0, out=predicted)
+    return predicted
+
+
+def _empty_fits(*params):
+    return pd.DataFrame(columns=['n_days', 'last_date', 'history_mean', *params])
+
+
+def _season_columns(season):
+    """(products, SEASON_DAYS) array -> {'season_0': ..., ...}; column k is the season of forecast step k+1"""
+    return {f'season_{k}': season[:, k] for k in range(SEASON_DAYS)}
+
+
+def _season_steps(fits, forecast_days):
+    """Per-step seasonal component from the season_k columns, shape (products, days)"""
+    season = fits[[f'season_{k}' for k in range(SEASON_DAYS)]].to_numpy(dtype=np.float64)
+    return season[:, np.arange(forecast_days) % SEASON_DAYS]
+
+
+def _row_means(block):
+    """Mean of the non-NaN cells of each row (0 for all-NaN rows)"""
+    present = ~np.isnan(block)
+    counts = present.sum(axis=1)
+    sums = np.where(present, block, 0.0).sum(axis=1)
+    return np.divide(sums, counts, out=np.zeros(len(block)), where=counts > 0), counts
+
+
+def _last_days(values, span, days):
+    """The last `days` cells of each product's history (NaN where the history is shorter)"""
+    offsets = span[:, None] - days + np.arange(days)[None, :]
+    gathered = np.take_along_axis(values, np.clip(offsets, 0, None), axis=1) if values.size else \
+        np.empty((len(span), days))
+    gathered[offsets < 0] = np.nan
+    return gathered
+
+
+def _flat_forecast(fits, forecast_days):
+    level = np.maximum(fits['level'].to_numpy(dtype=np.float64), 0)
+    return np.repeat(level[:, None], forecast_days, axis=1)
+
+
+# --- NumPy Models ---
+# Each fits every product at once on the dense matrix: loops run over days,
+# never over products.
+def fit_moving_average(history):
+    """Level = mean daily demand over the last MOVING_AVERAGE_DAYS days (no-sale days count as 0)"""
+    if len(history.products) == 0:
+        return _empty_fits('level')
+    level, _ = _row_means(_last_days(history.values, history.span, MOVING_AVERAGE_DAYS))
+    return _history_frame(history, level=level)
+
+
+def fit_simple_smoothing(history):
+    """Simple exponential smoothing with weight SES_ALPHA on each new day"""
+    if len(history.products) == 0:
+        return _empty_fits('level')
+    span, values = history.span, history.values
+    level = values[:, 0].copy()
+    for t in range(1, values.shape[1]):
+        active = t < span
+        level = np.where(active, SES_ALPHA * values[:, t] + (1 - SES_ALPHA) * level, level)
+    return _history_frame(history, level=level)
+
+
+def fit_holt_winters(history):
+    """
+    Additive Holt-Winters with a damped trend and a weekly season. The first week
+    seeds level and season, the second week the trend; shorter histories start flat.
+    """
+    if len(history.products) == 0:
+        return _empty_fits('level', 'trend', *(f'season_{k}' for k in range(SEASON_DAYS)))
+    span, values = history.span, history.values
+    padded = np.full((len(span), max(values.shape[1], 2 * SEASON_DAYS)), np.nan)
+    padded[:, :values.shape[1]] = values
+
+    first_week, first_count = _row_means(padded[:, :SEASON_DAYS])
+    second_week, second_count = _row_means(padded[:, SEASON_DAYS:2 * SEASON_DAYS])
+    level = first_week
+    trend = np.where(second_count > 0, (second_week - first_week) / SEASON_DAYS, 0.0)
+    season = np.nan_to_num(padded[:, :SEASON_DAYS] - level[:, None])  # Indexed by day offset % SEASON_DAYS
+
+    alpha, beta, gamma, phi = HOLT_WINTERS_ALPHA, HOLT_WINTERS_BETA, HOLT_WINTERS_GAMMA, HOLT_WINTERS_DAMPING
+    for t in range(SEASON_DAYS, values.shape[1]):
+        active = t < span
+        y = values[:, t]
+        s = season[:, t % SEASON_DAYS]
+        new_level = alpha * (y - s) + (1 - alpha) * (level + phi * trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        season[:, t % SEASON_DAYS] = np.where(active, gamma * (y - new_level) + (1 - gamma) * s, s)
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+
+    # Rotate so season_k lines up with forecast step k+1 (day offset span + k)
+    next_offsets = (span[:, None] + np.arange(SEASON_DAYS)[None, :]) % SEASON_DAYS
+    season = np.take_along_axis(season, next_offsets, axis=1)
+    return _history_frame(history, level=level, trend=trend, **_season_columns(season))
+
+
+def forecast_holt_winters(fits, forecast_days):
+    phi = HOLT_WINTERS_DAMPING
+    steps = np.arange(1, forecast_days + 1)
+    damped_steps = phi * (1 - phi ** steps) / (1 - phi)
+    predicted = (fits['level'].to_numpy(dtype=np.float64)[:, None]
+                 + fits['trend'].to_numpy(dtype=np.float64)[:, None] * damped_steps[None, :]
+                 + _season_steps(fits, forecast_days))
+    np.maximum(predicted, 0, out=predicted)
+    return predicted
+
+
+def fit_seasonal_naive(history):
+    """Each weekday repeats its value from the last observed week (the history mean if shorter)"""
+    if len(history.products) == 0:
+        return _empty_fits(*(f'season_{k}' for k in range(SEASON_DAYS)))
+    last_week = _last_days(history.values, history.span, SEASON_DAYS)
+    mean, _ = _row_means(history.values)
+    last_week = np.where(np.isnan(last_week), mean[:, None], last_week)
+    return _history_frame(history, **_season_columns(last_week))
+
+
+def forecast_seasonal_naive(fits, forecast_days):
+    return np.maximum(_season_steps(fits, forecast_days), 0)
+
+
+# --- Model Registry ---
+# A model fits a DailyHistory for every product at once and returns a fits frame indexed by product_name (with n_days, last_date
+# and history_mean); forecast(fits, days) turns it into a (products, days) array.
+ForecastModel = namedtuple('ForecastModel', ['name', 'label', 'fit', 'forecast'])
+
+MODELS = {}
+
+
+def register_model(model):
+    """Make a ForecastModel available to the prediction page and the forecast cache"""
+    MODELS[model.name] = model
+    return model
+
+
+def get_model(name=MODEL_NAME):
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown forecasting model: {name}")
+
+
+register_model(ForecastModel("linear_trend", "Linear Trend", fit_trends, forecast_matrix))
+register_model(ForecastModel("moving_average", f"Moving Average ({MOVING_AVERAGE_DAYS}-day)",
+                             fit_moving_average, _flat_forecast))
+register_model(ForecastModel("simple_smoothing", "Exponential Smoothing", fit_simple_smoothing, _flat_forecast))
+register_model(ForecastModel("holt_winters", "Holt-Winters (weekly)", fit_holt_winters, forecast_holt_winters))
+register_model(ForecastModel("seasonal_naive", "Seasonal Naive (day of week)",
+                             fit_seasonal_naive, forecast_seasonal_naive))
+
+
+def tidy_forecast(products, last_dates, predicted):
+    """Lays a (products, days) prediction array out as (product_name, date, predicted_quantity) rows"""
+    forecast_days = predicted.shape[1]
+    steps = np.arange(1, forecast_days + 1, dtype=np.int64)
+    future_day = _day_numbers(last_dates)[:, None] + steps[None, :]
+    return pd.DataFrame({
+        'product_name': np.repeat(np.asarray(products, dtype=object), forecast_days),
+        'date': pd.to_datetime(future_day.ravel(), unit='D'),
+        'predicted_quantity': predicted.ravel(),
+    })
+
+
+def forecast_table(fits, forecast_days, min_history=MIN_HISTORY_DAYS, model=MODEL_NAME):
+    """
+    Expands a model's fits into a tidy forecast table with columns
+    (product_name, date, predicted_quantity) for the next `forecast_days` days.
+    Products with fewer than `min_history` days of data are left out.
+    """
+    usable = fits[fits['n_days'] >= min_history]
+    if usable.empty or forecast_days <= 0:
+        return tidy_forecast([], pd.Series(dtype='datetime64[ns]'), np.empty((0, max(forecast_days, 0))))
+
+    predicted = get_model(model).forecast(usable, forecast_days)
+    return tidy_forecast(usable.index, usable['last_date'], predicted)
+
+
+def forecast_all_products(df, forecast_days, min_history=MIN_HISTORY_DAYS, model=MODEL_NAME):
+    """Convenience wrapper: raw sales rows in, tidy forecast table for every product out"""
+    fits = get_model(model).fit(daily_matrix(daily_product_totals(df)))
+    return forecast_table(fits, forecast_days, min_history=min_history, model=model)
@@ -0,0 +1,339 @@
+import gzip
+import os
+import time
+
+import pandas as pd
+
+import perf
+import snapshot
+from db import db_connection, to_day_numbers
+from forecast_cache import bump_data_version, get_data_version
+
+# --- Constants ---
+CHUNK_ROWS = 50_000  # Rows held in memory at once while streaming a file into the database
+REQUIRED_KEYS = ['date', 'product', 'quantity']
+
+
+# --- Chunked Readers ---
+# Each reader yields (DataFrame chunk, fraction_done) pairs with the file's own
+# column headers, so memory stays bounded by chunk_rows whatever the file size.
+def iter_xlsx_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Stream an .xlsx workbook's first sheet with openpyxl's read-only row iterator"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"column_{i}" for i, c in enumerate(header)]
+        total = (sheet.max_row or 0) - 1
+
+        batch, done = [], 0
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                done += len(batch)
+                yield pd.DataFrame(batch, columns=columns), (done / total if total > 0 else None)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns), 1.0
+    finally:
+        workbook.close()
+
+
+def iter_xls_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Legacy .xls has no streaming reader; read it once and hand it out in slices"""
+    df = pd.read_excel(file_path)
+    total = len(df)
+    for start in range(0, total, chunk_rows):
+        yield df.iloc[start:start + chunk_rows], min(start + chunk_rows, total) / total
+
+
+def iter_csv_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Stream a CSV with pandas' chunked reader; progress comes from the file offset"""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunk_rows):
+            yield chunk, (handle.tell() / size if size else None)
+
+
+def iter_csv_gz_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Stream a gzip-compressed CSV; progress comes from the compressed file offset"""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as raw, gzip.GzipFile(fileobj=raw) as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunk_rows):
+            yield chunk, (raw.tell() / size if size else None)
+
+
+def iter_parquet_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """
+    Columnar Parquet read: only the columns the loader maps are decoded,
+    one record batch at a time.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet uploads need the 'pyarrow' package (pip install pyarrow).")
+
+    parquet_file = pq.ParquetFile(file_path)
+    cols = resolve_columns(parquet_file.schema_arrow.names)
+    # Unmapped files are read header-only so the loader can report the missing columns
+    wanted = [c for c in cols.values() if c is not None] if cols else []
+    if not wanted:
+        yield pd.DataFrame(columns=parquet_file.schema_arrow.names), 1.0
+        return
+
+    total = parquet_file.metadata.num_rows
+    done = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=wanted):
+        done += batch.num_rows
+        yield batch.to_pandas(), (done / total if total else None)
+
+
+# Longest suffixes first so ".csv.gz" wins over ".gz"
+FILE_READERS = [
+    ('.csv.gz', iter_csv_gz_chunks),
+    ('.parquet', iter_parquet_chunks),
+    ('.csv', iter_csv_chunks),
+    ('.xlsx', iter_xlsx_chunks),
+    ('.xls', iter_xls_chunks),
+]
+UPLOAD_TYPES = ["xlsx", "xls", "csv", "gz", "parquet"]  # Extensions offered by the Upload page
+
+
+def is_supported_file(file_name):
+    """True if one of FILE_READERS can read the file, judged by its extension"""
+    name = file_name.lower()
+    return any(name.endswith(suffix) for suffix, _ in FILE_READERS)
+
+
+def iter_file_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """Pick the chunked reader for a file by its extension"""
+    name = file_path.lower()
+    for suffix, reader in FILE_READERS:
+        if name.endswith(suffix):
+            return reader(file_path, chunk_rows)
+    raise ValueError(f"Unsupported file type: {os.path.basename(file_path)}")
+
+
+# --- Chunk Preparation ---
+def resolve_columns(columns):
+    """Map the file's headers onto Date/Product/Quantity/Price/Revenue; None if required ones are missing"""
+    col_map = {str(col).lower().strip(): col for col in columns}
+    if not all(key in col_map for key in REQUIRED_KEYS):
+        return None
+    return {
+        'date': col_map['date'],
+        'product': col_map['product'],
+        'quantity': col_map['quantity'],
+        'price': col_map.get('price'),
+        'revenue': col_map.get('revenue'),
+    }
+
+
+def prepare_chunk(chunk, cols):
+    """Vectorized conversion of one raw chunk into sales rows (date, product_name, quantity, revenue)"""
+    quantity = chunk[cols['quantity']]
+
+    # Calculate Revenue
+    if cols['price'] is not None:
+        revenue = quantity * chunk[cols['price']].fillna(0)
+    elif cols['revenue'] is not None:
+        revenue = chunk[cols['revenue']].fillna(0)
+    else:
+        revenue = 0.0
+
+    # Blank Date cells parse as NaT; reject them rather than store a nonsense day
+    dates = pd.to_datetime(chunk[cols['date']])
+    missing = int(dates.isna().sum())
+    if missing:
+        raise IngestValidationError(f"{missing} row(s) have no Date.")
+
+    return pd.DataFrame({
+        'date': to_day_numbers(dates),  # integer Julian day numbers
+        'product_name': chunk[cols['product']].values,
+        'quantity': quantity.values,
+        'revenue': revenue.values if isinstance(revenue, pd.Series) else revenue,
+    })
+
+
+# --- Loader ---
+class IngestValidationError(ValueError):
+    """The file cannot be loaded as sales data (empty, or required columns missing)"""
+
+
+def ingest_file(file_path, db_path, mode="Append", progress_callback=None, chunk_rows=CHUNK_ROWS):
+    """
+    Streams an Excel, CSV, gzip CSV or Parquet file into the database in bounded
+    chunks inside one transaction. The format is picked from the file extension.
+
+    Rows are summed per (product_name, date) and upserted: only keys that are new
+    or whose values changed are written and marked stale for forecasting,
+    so re-importing an almost identical file costs little more than reading it.
+    `progress_callback(rows_loaded, fraction_done)` is called after every chunk
+    (fraction_done is None when the reader cannot tell).
+
+    Returns a dict with rows (read from the file), inserted, updated and unchanged
+    (counted in product/day keys) plus the data_version the load committed.
+    Raises IngestValidationError for unusable files.
+    """
+    with perf.span('ingest.load', db=db_path, mode=mode, bytes=os.path.getsize(file_path)) as s:
+        stats, merged = _load(file_path, db_path, mode, progress_callback, chunk_rows)
+        s['rows'] = stats['rows']
+
+    # Keep the columnar copy the analytic pages read (see snapshot.py) in step with the load
+    if merged is None:
+        snapshot.ensure_snapshot(db_path, stats['data_version'])
+    return stats
+
+
+def _load(file_path, db_path, mode, progress_callback, chunk_rows):
+    chunks = iter_file_chunks(file_path, chunk_rows)
+    first = next(chunks, None)
+    if first is None:
+        raise IngestValidationError("File is empty.")
+
+    # Validate columns
+    cols = resolve_columns(first[0].columns)
+    if cols is None:
+        raise IngestValidationError("File missing required columns (Date, Product, Quantity).")
+
+    rows_read = 0
+    with db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for table in ("temp_sales_import", "temp_sales_changes"):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute('''
+                CREATE TEMP TABLE temp_sales_import (
+                    date INTEGER,
+                    product_name TEXT,
+                    quantity INTEGER,
+                    revenue REAL
+                )
+            ''')
+
+            if mode == "Replace Database":
+                cursor.execute("DELETE FROM sales")
+
+            # Stage every chunk; only one chunk is ever held in memory.
+            # The span's ms less prepare_ms and insert_ms is time spent reading the file.
+            with perf.span('ingest.stage') as stage:
+                prepare_s = insert_s = 0.0
+                for chunk, fraction in _with_first(first, chunks):
+                    start = time.perf_counter()
+                    final_df = prepare_chunk(chunk, cols)
+                    prepared = time.perf_counter()
+                    cursor.executemany(
+                        "INSERT INTO temp_sales_import (date, product_name, quantity, revenue) VALUES (?, ?, ?, ?)",
+                        zip(*(final_df[c].tolist() for c in final_df.columns)))
+                    prepare_s += prepared - start
+                    insert_s += time.perf_counter() - prepared
+                    rows_read += len(final_df)
+                    if progress_callback:
+                        progress_callback(rows_read, fraction)
+                stage.update(rows=rows_read, prepare_ms=round(prepare_s * 1000, 3),
+                             insert_ms=round(insert_s * 1000, 3))
+
+            with perf.span('ingest.upsert') as upsert:
+                # Index the staged keys so the aggregation below walks them in key order
+                cursor.execute("CREATE INDEX temp.idx_temp_sales_import ON temp_sales_import (product_name, date)")
+
+                # Diff the file's daily totals against sales: keep only new or changed keys
+                cursor.execute('''
+                    CREATE TEMP TABLE temp_sales_changes AS
+                    SELECT u.date, u.product_name, u.quantity, u.revenue, s.id IS NULL AS is_new
+                    FROM (
+                        SELECT date, product_name, SUM(quantity) AS quantity, SUM(revenue) AS revenue
+                        FROM temp_sales_import
+                        GROUP BY product_name, date
+                    ) u
+                    LEFT JOIN sales s ON s.product_name = u.product_name AND s.date = u.date
+                    WHERE s.id IS NULL OR s.quantity IS NOT u.quantity OR s.revenue IS NOT u.revenue
+                ''')
+                total_keys = cursor.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM temp_sales_import GROUP BY product_name, date)").fetchone()[0]
+                changed, inserted = cursor.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(is_new), 0) FROM temp_sales_changes").fetchone()
+
+                # Upsert: new keys insert, changed keys update in place (ids are kept)
+                cursor.execute('''
+                    INSERT INTO sales (date, product_name, quantity, revenue)
+                    SELECT date, product_name, quantity, revenue FROM temp_sales_changes
+                    WHERE true
+                    ORDER BY product_name, date
+                    ON CONFLICT (product_name, date) DO UPDATE SET
+                        quantity = excluded.quantity,
+                        revenue = excluded.revenue
+                ''')
+                upsert.update(rows=changed, inserted=inserted)
+
+            # Stamp a new data version; only products with changed rows go stale
+            if mode == "Replace Database":
+                bump_data_version(cursor)
+            if changed:
+                changed_products = [r[0] for r in cursor.execute("SELECT DISTINCT product_name FROM temp_sales_changes")]
+                bump_data_version(cursor, changed_products)
+            data_version = get_data_version(conn)
+
+            # Cleanup (temp_sales_changes is kept for the snapshot merge below)
+            cursor.execute("DROP TABLE temp_sales_import")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # Merge the load's new or changed rows into the previous version's snapshot, streamed
+        # after commit so the write lock is not held while the snapshot is written
+        merged = None
+        try:
+            if changed and mode != "Replace Database" and snapshot.has_snapshot(db_path, data_version - 1):
+                merged = snapshot.merge_snapshot(conn, data_version - 1, data_version, changed_products, '''
+                    SELECT product_name, date, quantity, revenue FROM temp_sales_changes
+                    ORDER BY product_name, date
+                ''')
+        finally:
+            cursor.execute("DROP TABLE IF EXISTS temp_sales_changes")
+
+    stats = {
+        'rows': rows_read,
+        'inserted': inserted,
+        'updated': changed - inserted,
+        'unchanged': total_keys - changed,
+        'data_version': data_version,
+    }
+    return stats, merged
+
+
+def process_excel_file(file_path, db_path, mode="Append", progress_callback=None, chunk_rows=CHUNK_ROWS):
+    """
+    Loads a sales file via ingest_file and reports the outcome for the UI.
+    Returns: (success_bool, message_string, count_int)
+    """
+    try:
+        stats = ingest_file(file_path, db_path, mode=mode, progress_callback=progress_callback,
+                            chunk_rows=chunk_rows)
+    except IngestValidationError as e:
+        return False, f"❌ {e}", 0
+    except Exception as e:
+        return False, f"Error processing file: {e}", 0
+
+    return True, load_message(stats), stats['rows']
+
+
+def load_message(stats):
+    """UI message for a successful load's stats"""
+    return (f"✅ Successfully loaded {stats['rows']} records! "
+            f"({stats['inserted']} new, {stats['updated']} updated, {stats['unchanged']} unchanged)")
+
+
+def _with_first(first, rest):
+    """Re-attach the already-consumed first chunk to the rest of the stream"""
+    yield first
+    yield from rest
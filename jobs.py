@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from db import db_connection
+from uploads import load_upload
+
+# --- Constants ---
+# Job status lives in its own database: a project database is write-locked for the
+# whole of an ingest transaction, so progress written there would stay invisible
+# (and block) until the load had finished.
+JOBS_DB = "jobs.db"
+MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+PROGRESS_INTERVAL_SECONDS = 0.5  # Minimum gap between progress writes from a worker
+ACTIVE_STATUSES = ("queued", "running")
+
+_initialized = set()
+_executor = None
+_lanes = {}  # absolute project db path -> deque of job args; the head is running
+_lanes_lock = threading.Lock()
+
+
+# --- Jobs Table ---
+def init_jobs_db(jobs_db=JOBS_DB):
+    """
+    Create the jobs table once per process. Jobs left queued or running by a
+    process that no longer exists (e.g. a restarted server) are marked failed.
+    """
+    key = os.path.abspath(jobs_db)
+    if key in _initialized:
+        return
+    with db_connection(jobs_db) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                db_path TEXT NOT NULL,
+                upload_dir TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                status TEXT NOT NULL,
+                rows_loaded INTEGER NOT NULL DEFAULT 0,
+                fraction REAL,
+                message TEXT,
+                owner_pid INTEGER NOT NULL,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        ''')
+        orphaned = [job_id for job_id, pid in conn.execute(
+            "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES) if not _pid_alive(pid)]
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', message = ?, finished_at = ? WHERE id = ?",
+            [("❌ Interrupted by a server restart; load the file again.", time.time(), job_id)
+             for job_id in orphaned])
+        conn.commit()
+    _initialized.add(key)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _update_job(jobs_db, job_id, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with db_connection(jobs_db) as conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+
+
+def get_jobs(job_ids, jobs_db=JOBS_DB):
+    """Status rows for the given job ids, indexed by id in submission order"""
+    init_jobs_db(jobs_db)
+    if not job_ids:
+        return pd.DataFrame()
+    placeholders = ", ".join("?" * len(job_ids))
+    with db_connection(jobs_db) as conn:
+        return pd.read_sql_query(
+            f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY id", conn,
+            params=list(job_ids), index_col='id')
+
+
+# --- Queue ---
+# Jobs run in a pool of worker processes, so several projects load in parallel
+# across cores. Jobs for the same project database run one after another (they
+# would only queue on SQLite's write lock otherwise); the parent keeps that order.
+def submit_ingest(db_path, upload_dir, sha256, file_name, mode="Append", jobs_db=JOBS_DB):
+    """Queue a saved upload for loading in a worker process; returns the job id"""
+    init_jobs_db(jobs_db)
+    with db_connection(jobs_db) as conn:
+        cursor = conn.execute('''
+            INSERT INTO jobs (db_path, upload_dir, sha256, file_name, mode, status, owner_pid, submitted_at)
+            VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)
+        ''', (db_path, upload_dir, sha256, file_name, mode, os.getpid(), time.time()))
+        conn.commit()
+        job_id = cursor.lastrowid
+
+    lane = os.path.abspath(db_path)
+    args = (jobs_db, job_id, db_path, upload_dir, sha256, mode)
+    with _lanes_lock:
+        queue = _lanes.setdefault(lane, deque())
+        queue.append(args)
+        if len(queue) > 1:
+            return job_id  # The running job for this database starts it when done
+    _start(lane, args)
+    return job_id
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Forked workers where available: a spawned worker re-runs the __main__ module,
+        # which under Streamlit is the app script itself
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _executor
+
+
+def _start(lane, args):
+    try:
+        future = _get_executor().submit(run_job, *args)
+    except BrokenProcessPool as e:
+        _reset_executor()
+        _job_done(lane, args, e)
+        return
+    future.add_done_callback(lambda f: _job_done(lane, args, f.exception()))
+
+
+def _reset_executor():
+    global _executor
+    _executor = None
+
+
+def _job_done(lane, args, error):
+    """Record a worker crash, then start the next job queued for the same database"""
+    if error is not None:
+        if isinstance(error, BrokenProcessPool):
+            _reset_executor()
+        jobs_db, job_id = args[:2]
+        _update_job(jobs_db, job_id, status="failed", message=f"Error processing file: {error}",
+                    finished_at=time.time())
+
+    with _lanes_lock:
+        queue = _lanes[lane]
+        queue.popleft()
+        next_args = queue[0] if queue else None
+        if next_args is None:
+            del _lanes[lane]
+    if next_args is not None:
+        _start(lane, next_args)
+
+
+# --- Worker ---
+def run_job(jobs_db, job_id, db_path, upload_dir, sha256, mode):
+    """Worker-process entry point: load the upload, reporting progress to the jobs table"""
+    _update_job(jobs_db, job_id, status="running", started_at=time.time())
+
+    last_write = 0.0
+    def progress(rows_loaded, fraction):
+        nonlocal last_write
+        now = time.monotonic()
+        if now - last_write >= PROGRESS_INTERVAL_SECONDS:
+            last_write = now
+            _update_job(jobs_db, job_id, rows_loaded=rows_loaded, fraction=fraction)
+
+    success, msg, count = load_upload(db_path, upload_dir, sha256, mode=mode, progress_callback=progress)
+    _update_job(jobs_db, job_id, status="done" if success else "failed", message=msg,
+                rows_loaded=count, fraction=1.0 if success else None, finished_at=time.time())
@@ -0,0 +1,29 @@
+import glob
+import os
+
+import db
+
+USERS_DIR = "users"
+
+
+def find_project_dbs(users_dir=USERS_DIR):
+    """Every user default database and per-project database under `users_dir`"""
+    patterns = [
+        os.path.join(users_dir, "*", "data.db"),
+        os.path.join(users_dir, "*", "projects", "*", "data.db"),
+    ]
+    return sorted(path for pattern in patterns for path in glob.glob(pattern))
+
+
+def migrate_all(users_dir=USERS_DIR):
+    """Upgrade every project database in place to the latest schema version"""
+    for db_path in find_project_dbs(users_dir):
+        with db.db_connection(db_path) as conn:
+            before = conn.execute("PRAGMA user_version").fetchone()[0]
+            after = db.migrate(conn)
+        status = "up to date" if before == after else f"v{before} -> v{after}"
+        print(f"{db_path}: {status}")
+
+
+if __name__ == "__main__":
+    migrate_all()
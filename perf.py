@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# --- Constants ---
+METRICS_LOG_ENV_VAR = "SHOPPULSE_METRICS_LOG"
+METRICS_LOG = os.environ.get(METRICS_LOG_ENV_VAR, "")  # Off unless set to a path, e.g. metrics.jsonl
+METRICS_LOG_MAX_BYTES = 64 * 1024 * 1024  # Beyond this the log is rotated to <path>.1, replacing the previous one
+
+# --- Timing Spans ---
+# `with span("matrix.read") as s: ...; s['rows'] = n` times a hot-path stage. Spans
+# opened while a Streamlit rerun is being drawn (between begin_run and end_run on
+# the same thread) are collected for that rerun, shown in the Performance panel and
+# written to the metrics log when it ends. Spans anywhere else (background loads,
+# the HTTP server, scripts) are written to the log as they finish. Each log line is
+# one span: ts, run, the run's context (user, project, page), name, ms, depth and
+# any fields the caller set, such as rows and bytes.
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # A worker forked mid-rerun (background loads) would otherwise keep collecting for a run that never ends,
+    # and one forked while another thread was writing the log would inherit _log_lock held forever
+    global _log_lock
+    _local.run = None
+    _local.depth = 0
+    _log_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the enclosed block; yields the span dict so callers can add rows / bytes"""
+    depth = getattr(_local, 'depth', 0)
+    record = {'name': name, 'depth': depth, **fields}
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run['spans'].append(record)  # In start order, so nested spans follow their parent
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        _local.depth = depth
+        if run is None:
+            write_log([record])
+
+
+def begin_run(**context):
+    """Start collecting spans for this thread's rerun; returns the context dict (update it as it becomes known)"""
+    _local.run = {'context': dict(context, run=uuid.uuid4().hex[:12]), 'spans': []}
+    _local.depth = 0
+    return _local.run['context']
+
+
+def current_spans():
+    """Spans opened so far in this thread's rerun, in start order (open spans have no 'ms' yet)"""
+    run = getattr(_local, 'run', None)
+    return list(run['spans']) if run is not None else []
+
+
+def end_run():
+    """Stop collecting, write the rerun's spans to the metrics log and return them"""
+    run = getattr(_local, 'run', None)
+    _local.run = None
+    if run is None:
+        return []
+    write_log(run['spans'], run['context'])
+    return run['spans']
+
+
+# --- Metrics Log ---
+# Every span of every rerun is one line, so the log is opt-in and bounded: once it
+# passes METRICS_LOG_MAX_BYTES it becomes <path>.1 and a fresh log is started, so at
+# most about twice that is kept on disk.
+def _rotate(path):
+    try:
+        if os.path.getsize(path) >= METRICS_LOG_MAX_BYTES:
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        pass
+
+
+def write_log(spans, context=None, path=None):
+    """Append spans to the JSON-lines metrics log (a no-op when logging is disabled)"""
+    path = METRICS_LOG if path is None else path
+    if not path or not spans:
+        return
+    ts = time.time()
+    lines = "".join(json.dumps({'ts': round(ts, 3), **(context or {}), **s}, default=str) + "\n" for s in spans)
+    try:
+        with _log_lock:
+            _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+    except OSError:
+        pass  # Metrics must never break the page or the load being measured
+
+
+def read_log(path=None):
+    """The metrics log, rotated part first, as a DataFrame (one row per span) for regression and hot-project analysis"""
+    import pandas as pd
+
+    path = METRICS_LOG if path is None else path
+    parts = [p for p in (path + ".1", path) if path and os.path.exists(p) and os.path.getsize(p)]
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_json(p, lines=True) for p in parts], ignore_index=True)
+    if 'ts' in df:
+        df['ts'] = pd.to_datetime(df['ts'], unit='s')
+    return df
@@ -0,0 +1,101 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cache
+import perf
+import workspace
+from db import db_connection, from_day_numbers, init_db
+
+# --- Constants ---
+PORTFOLIO_WORKERS = max(2, min(8, (os.cpu_count() or 1) * 2))  # SQLite reads release the GIL
+TOP_PRODUCTS = 10
+
+_pool = ThreadPoolExecutor(max_workers=PORTFOLIO_WORKERS, thread_name_prefix="portfolio")
+
+# --- Per-Project Partials ---
+# Each project database contributes its per-product and per-day totals, memoized on
+# the project's data version (see cache.py). Reopening the portfolio after one store
+# loads new data re-queries only that store; the rest are cache hits. Partials are
+# read from the separate files in parallel rather than ATTACHed, so every project
+# keeps using its own pooled connection and lock.
+ProjectPartial = namedtuple('ProjectPartial', ['products', 'daily'])
+
+
+def project_partial(conn):
+    """(product_name, quantity, revenue) and (date, quantity) totals of one project; dates are day numbers"""
+    with perf.span('portfolio.partial', db=conn.execute("PRAGMA database_list").fetchone()[2]) as s:
+        products = pd.read_sql_query('''
+            SELECT product_name, SUM(quantity) AS quantity, SUM(revenue) AS revenue
+            FROM sales
+            GROUP BY product_name
+        ''', conn)
+        daily = pd.read_sql_query('''
+            SELECT date, SUM(quantity) AS quantity
+            FROM sales
+            GROUP BY date
+            ORDER BY date
+        ''', conn)
+        s['rows'] = len(products) + len(daily)
+    return ProjectPartial(products, daily)
+
+
+def load_partial(db_path):
+    """The project's cached ProjectPartial"""
+    init_db(db_path)
+    with db_connection(db_path) as conn:
+        return cache.memoize(conn, 'portfolio_partial', project_partial)
+
+
+# --- Portfolio ---
+def combine(partials, top_n=TOP_PRODUCTS):
+    """
+    Portfolio figures from {project: ProjectPartial}: total_units, total_revenue,
+    active_products (distinct names across projects), latest_date, `trend` (daily
+    totals, gaps as 0), `top_products` (ascending) and a per-project `projects` table.
+    trend and top_products are None when no project has data.
+    """
+    projects = pd.DataFrame({
+        'project': list(partials),
+        'units': [p.products['quantity'].sum() for p in partials.values()],
+        'revenue': [p.products['revenue'].sum() for p in partials.values()],
+        'products': [len(p.products) for p in partials.values()],
+        'latest_date': [from_day_numbers(p.daily['date'].iloc[-1]) if len(p.daily) else pd.NaT
+                        for p in partials.values()],
+    })
+    view = {
+        'total_units': projects['units'].sum(),
+        'total_revenue': projects['revenue'].sum(),
+        'active_products': 0,
+        'latest_date': projects['latest_date'].max() if projects['latest_date'].notna().any() else None,
+        'trend': None,
+        'top_products': None,
+        'projects': projects,
+    }
+    with_data = [p for p in partials.values() if len(p.products)]
+    if not with_data:
+        return view
+
+    totals = pd.concat([p.products for p in with_data]).groupby('product_name')['quantity'].sum()
+    best = np.argsort(-totals.to_numpy(), kind='stable')[:top_n][::-1]
+    daily = pd.concat([p.daily for p in with_data]).groupby('date')['quantity'].sum()
+    days = np.arange(daily.index.min(), daily.index.max() + 1)
+    view.update(
+        active_products=len(totals),
+        trend=pd.DataFrame({'date': from_day_numbers(days),
+                            'quantity': daily.reindex(days, fill_value=0).to_numpy(dtype=np.float64)}),
+        top_products=pd.DataFrame({'product_name': totals.index[best], 'quantity': totals.to_numpy()[best]}),
+    )
+    return view
+
+
+def portfolio(username, top_n=TOP_PRODUCTS, users_dir=workspace.USERS_DIR):
+    """Figures across every project database of the user (see combine); projects without a database are skipped"""
+    paths = {project: workspace.project_paths(username, project, users_dir)[0]
+             for project in workspace.list_projects(username, users_dir)}
+    paths = {project: path for project, path in paths.items() if os.path.exists(path)}
+    partials = dict(zip(paths, _pool.map(load_partial, paths.values())))
+    return combine(partials, top_n)
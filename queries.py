@@ -0,0 +1,55 @@
+import pandas as pd
+
+from db import from_day_numbers
+
+# --- Constants ---
+_IN_CHUNK = 500  # Max product names bound into one IN (...) clause
+
+
+# --- Read Queries ---
+# Each view asks SQLite for exactly what it renders. Aggregation runs inside the
+# database against the daily sales rows, so pandas only ever sees result-sized frames.
+# Trend, top products and per-product series come from timeseries.py's sales matrix.
+
+
+def dashboard_metrics(conn):
+    """
+    Totals for the four Dashboard metric cards.
+    Returns a dict with total_units, total_revenue, active_products and latest_date
+    (latest_date is None when the project has no data).
+    """
+    total_units, total_revenue, active_products, latest_date = conn.execute('''
+        SELECT COALESCE(SUM(quantity), 0),
+               COALESCE(SUM(revenue), 0),
+               COUNT(DISTINCT product_name),
+               MAX(date)
+        FROM sales
+    ''').fetchone()
+    return {
+        'total_units': total_units,
+        'total_revenue': total_revenue,
+        'active_products': active_products,
+        'latest_date': from_day_numbers(latest_date) if latest_date is not None else None,
+    }
+
+
+def daily_product_quantities(conn, products=None):
+    """
+    Daily (date, product_name, quantity) rows for the given products, or every product
+    when `products` is None. Product lists are bound in chunks to stay under SQLite's
+    variable limit.
+    """
+    if products is None:
+        df = pd.read_sql_query("SELECT date, product_name, quantity FROM sales", conn)
+    else:
+        products = list(products)
+        frames = []
+        for i in range(0, len(products), _IN_CHUNK):
+            chunk = products[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            frames.append(pd.read_sql_query(
+                f"SELECT date, product_name, quantity FROM sales WHERE product_name IN ({placeholders})",
+                conn, params=chunk))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['date', 'product_name', 'quantity'])
+    df['date'] = from_day_numbers(df['date'])
+    return df
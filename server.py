@@ -0,0 +1,302 @@
+"""
+HTTP API for ordering / replenishment systems: ingest, dashboard aggregates and
+batch forecasts over the same users/<name>/... project databases the app uses.
+
+    python server.py --host 127.0.0.1 --port 8000
+
+Sign in once with POST /auth/token {"username": ..., "password": ...} and send the
+returned token as "Authorization: Bearer <token>" (valid 12h; DELETE /auth/token
+revokes every API token of the account). Projects are addressed by name;
+"default" is the user's Default Project.
+
+    GET  /projects
+    POST /projects/{project}/ingest?file_name=sales.csv&mode=Append[&background=true]   (file bytes as body)
+    GET  /jobs/{job_id}
+    GET  /projects/{project}/dashboard
+    GET  /projects/{project}/forecasts?days=30&model=linear_trend&format=csv|json
+    GET  /projects/{project}/products/{product}/forecast?days=30&model=linear_trend
+
+Requests run concurrently: the event loop only parses and streams, while database
+and model work runs on Starlette's thread pool over db.py's shared connections.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import api
+import workspace
+from auth_service import AUTH_DB, authenticate, issue_session_token, revoke_sessions, verify_session_token
+from forecast_cache import CACHE_HORIZON_DAYS, cached_forecast_table
+from ingest import is_supported_file
+
+# --- Constants ---
+DEFAULT_PROJECT_ALIAS = "default"
+STREAM_CHUNK_PRODUCTS = 500  # Products serialized per streamed chunk
+INGEST_MODES = ("Append", "Replace Database")
+
+
+# --- Request Helpers ---
+async def current_user(request):
+    """Username from the request's bearer token; 401 otherwise"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    username = None
+    if scheme.lower() == "bearer" and token:
+        username = await run_in_threadpool(verify_session_token, token.strip(), request.app.state.auth_db,
+                                           kind='api')
+    if username is None:
+        raise HTTPException(401, "Missing or invalid bearer token.")
+    return username
+
+
+def project_paths(username, project):
+    """(db_path, upload_dir) of an existing project of the user; 404 for unknown names"""
+    workspace.init_user_workspace(username)
+    name = workspace.DEFAULT_PROJECT if project == DEFAULT_PROJECT_ALIAS else project
+    if name not in workspace.list_projects(username):
+        raise HTTPException(404, f"Unknown project: {project}")
+    return workspace.open_project(username, name)
+
+
+async def request_project(request):
+    username = await current_user(request)
+    return await run_in_threadpool(project_paths, username, request.path_params["project"])
+
+
+async def receive_upload(request, upload_dir):
+    """
+    Stream the request body into a temporary .part file in upload_dir (skipped by
+    uploads.sync_upload_dir), hashing it as it arrives. Returns (path, sha256, size).
+    """
+    fd, path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for block in request.stream():
+                digest.update(block)
+                await run_in_threadpool(f.write, block)
+                size += len(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def int_param(request, name, default, low, high):
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise HTTPException(400, f"{name} must be an integer.")
+    if not low <= value <= high:
+        raise HTTPException(400, f"{name} must be between {low} and {high}.")
+    return value
+
+
+def model_param(request):
+    model = request.query_params.get("model", api.MODEL_NAME)
+    if model not in api.MODELS:
+        raise HTTPException(400, f"Unknown model: {model}. Choose from {', '.join(api.MODELS)}.")
+    return model
+
+
+def iso_dates(frame, column='date'):
+    return frame.assign(**{column: frame[column].dt.strftime('%Y-%m-%d')})
+
+
+# --- Streaming ---
+def forecast_chunks(forecasts, days, fmt):
+    """Yield a tidy (product_name, date, predicted_quantity) forecast as CSV or a JSON array, chunk by chunk"""
+    if fmt == "json":
+        yield "["
+    first = True
+    for start in range(0, len(forecasts), STREAM_CHUNK_PRODUCTS):
+        table = cached_forecast_table(forecasts.iloc[start:start + STREAM_CHUNK_PRODUCTS], days)
+        if table.empty:
+            continue
+        if fmt == "csv":
+            yield table.to_csv(index=False, header=first, date_format='%Y-%m-%d')
+        else:
+            rows = iso_dates(table).to_json(orient='records')[1:-1]
+            yield rows if first else "," + rows
+        first = False
+    if fmt == "csv" and first:
+        yield "product_name,date,predicted_quantity\n"
+    if fmt == "json":
+        yield "]"
+
+
+# --- Endpoints ---
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def issue_token(request):
+    try:
+        body = await request.json()
+        username, password = body["username"], body["password"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(400, 'Expected JSON {"username": ..., "password": ...}.')
+    ok, message = await run_in_threadpool(authenticate, username, password, request.app.state.auth_db)
+    if not ok:
+        raise HTTPException(401, message)
+    token = await run_in_threadpool(issue_session_token, username, auth_db=request.app.state.auth_db,
+                                     kind='api')
+    return JSONResponse({"token": token, "token_type": "bearer"})
+
+
+async def revoke_tokens(request):
+    """Sign out every API client of the bearer's account (app sessions are not affected)"""
+    username = await current_user(request)
+    await run_in_threadpool(revoke_sessions, username, request.app.state.auth_db, kind='api')
+    return JSONResponse({"revoked": True})
+
+
+async def list_projects(request):
+    username = await current_user(request)
+    await run_in_threadpool(workspace.init_user_workspace, username)
+    projects = await run_in_threadpool(workspace.list_projects, username)
+    return JSONResponse({"projects": [DEFAULT_PROJECT_ALIAS] + projects[1:]})
+
+
+async def ingest(request):
+    db_path, upload_dir = await request_project(request)
+    file_name = os.path.basename(request.query_params.get("file_name", ""))
+    mode = request.query_params.get("mode", "Append")
+    if not file_name:
+        raise HTTPException(400, "file_name is required.")
+    if not is_supported_file(file_name):
+        raise HTTPException(415, f"Unsupported file type: {file_name}")
+    if mode not in INGEST_MODES:
+        raise HTTPException(400, f"mode must be one of: {', '.join(INGEST_MODES)}.")
+    path, sha256, size = await receive_upload(request, upload_dir)
+    try:
+        if not size:
+            raise HTTPException(400, "Request body is empty.")
+        # The received file is moved into the upload store, never read back into memory
+        background = request.query_params.get("background", "").lower() in ("1", "true", "yes")
+        result = await run_in_threadpool(api.ingest_path, db_path, upload_dir, file_name, path, mode, background,
+                                         sha256=sha256, move=True)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    if background:
+        return JSONResponse({"job_id": result, "status": "queued"}, status_code=202)
+    success, message, rows = result
+    return JSONResponse({"success": success, "message": message, "rows": rows}, status_code=200 if success else 422)
+
+
+async def job_status(request):
+    username = await current_user(request)
+    job_id = request.path_params["job_id"]
+    jobs = await run_in_threadpool(api.get_jobs, [job_id])
+    user_dir = os.path.abspath(os.path.join(workspace.USERS_DIR, username)) + os.sep
+    if job_id not in jobs.index or not os.path.abspath(jobs.at[job_id, 'db_path']).startswith(user_dir):
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    job = jobs.loc[job_id]
+    return JSONResponse({
+        "job_id": job_id,
+        "file_name": job.file_name,
+        "status": job.status,
+        "rows_loaded": None if pd.isna(job.rows_loaded) else int(job.rows_loaded),
+        "fraction": None if pd.isna(job.fraction) else float(job.fraction),
+        "message": job.message,
+    })
+
+
+async def dashboard(request):
+    db_path, _ = await request_project(request)
+    top_n = int_param(request, "top", api.TOP_PRODUCTS, 1, 1000)
+    view = await run_in_threadpool(api.dashboard, db_path, top_n)
+    body = {
+        "total_units": view['total_units'],
+        "total_revenue": view['total_revenue'],
+        "active_products": view['active_products'],
+        "latest_date": None if view['latest_date'] is None else view['latest_date'].strftime('%Y-%m-%d'),
+        "trend": [],
+        "top_products": [],
+    }
+    if view['active_products'] > 0:
+        body["trend"] = json.loads(iso_dates(view['trend']).to_json(orient='records'))
+        body["top_products"] = json.loads(view['top_products'].iloc[::-1].to_json(orient='records'))
+    return JSONResponse(body)
+
+
+async def batch_forecast(request):
+    db_path, _ = await request_project(request)
+    days = int_param(request, "days", 30, 1, CACHE_HORIZON_DAYS)
+    model = model_param(request)
+    fmt = request.query_params.get("format", "csv").lower()
+    if fmt not in ("csv", "json"):
+        raise HTTPException(400, "format must be csv or json.")
+
+    forecasts = await run_in_threadpool(api.load_forecasts, db_path, model)
+    media_type = "text/csv" if fmt == "csv" else "application/json"
+    headers = {"Content-Disposition": f'attachment; filename="forecast_{model}_{days}d.{fmt}"'}
+    return StreamingResponse(forecast_chunks(forecasts, days, fmt), media_type=media_type, headers=headers)
+
+
+async def product_forecast(request):
+    db_path, _ = await request_project(request)
+    product = request.path_params["product"]
+    days = int_param(request, "days", 30, 1, CACHE_HORIZON_DAYS)
+    model = model_param(request)
+    forecasts = await run_in_threadpool(api.load_forecasts, db_path, model)
+    if product not in forecasts.index:
+        raise HTTPException(404, f"Unknown product: {product}")
+
+    outlook = await run_in_threadpool(api.product_forecast, db_path, product, days, model)
+    body = {"product_name": product, "model": model, "forecast": None}
+    if outlook['forecast'] is not None:
+        body.update(
+            forecast=json.loads(iso_dates(outlook['forecast']).to_json(orient='records')),
+            avg_predicted=float(outlook['avg_predicted']),
+            current_avg=float(outlook['current_avg']),
+            growth_pct=float(outlook['growth']),
+            recommended_stock=float(outlook['recommended_stock']),
+        )
+    return JSONResponse(body)
+
+
+async def http_error(request, exc):
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+
+
+def create_app(auth_db=AUTH_DB):
+    app = Starlette(routes=[
+        Route("/health", health),
+        Route("/auth/token", issue_token, methods=["POST"]),
+        Route("/auth/token", revoke_tokens, methods=["DELETE"]),
+        Route("/projects", list_projects),
+        Route("/projects/{project}/ingest", ingest, methods=["POST"]),
+        Route("/projects/{project}/dashboard", dashboard),
+        Route("/projects/{project}/forecasts", batch_forecast),
+        Route("/projects/{project}/products/{product:path}/forecast", product_forecast),
+        Route("/jobs/{job_id:int}", job_status),
+    ], exception_handlers={HTTPException: http_error})
+    app.state.auth_db = auth_db
+    return app
+
+
+app = create_app()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
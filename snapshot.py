@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import forecast_cache
+import perf
+from db import JDN_UNIX_EPOCH, database_path, db_connection
+
+# --- Constants ---
+SNAPSHOT_ENV_VAR = "SHOPPULSE_SNAPSHOTS"
+SNAPSHOTS_ENABLED = os.environ.get(SNAPSHOT_ENV_VAR, "1") != "0"  # Set to 0 to always read SQLite
+SNAPSHOT_SUFFIX = ".snapshot"  # users/<name>/data.db -> users/<name>/data.db.snapshot/
+COLUMNS = ('products', 'codes', 'day', 'quantity', 'revenue')
+ROW_DTYPES = {'codes': np.int32, 'day': np.int32, 'quantity': np.float64, 'revenue': np.float64}
+CHUNK_ROWS = 100_000  # Rows held in memory at once while a snapshot is written or merged
+DAY_BIAS = 2 ** 31  # Shifts int32 days (negative before 1970) to non-negative for key packing
+
+# --- Columnar Snapshot ---
+# The analytic pages only need (product, date, quantity, revenue) of the daily sales.
+# After every load they are kept beside the database as one .npy file per
+# column: product names once (sorted), then per row an int32 product code, int32 day
+# (days since 1970-01-01, negative before it), float64 quantity and revenue, in
+# (product, date) order.
+# Each snapshot lives in a directory named after the data version it was taken at,
+# renamed into place only when complete. Readers memory-map the version matching
+# the database's current one (no parsing, no string objects) and fall back to SQLite
+# when it is missing, so a snapshot is never required and never stale.
+Snapshot = namedtuple('Snapshot', ('version',) + COLUMNS)
+
+
+def snapshot_dir(db_path):
+    return os.path.abspath(db_path) + SNAPSHOT_SUFFIX
+
+
+def has_snapshot(db_path, version):
+    return SNAPSHOTS_ENABLED and os.path.isdir(os.path.join(snapshot_dir(db_path), str(version)))
+
+
+def _file_id(db_path):
+    # A recreated database restarts its data versions; its snapshots must not match
+    return os.stat(db_path).st_ino
+
+
+def _open(db_path, version):
+    """Memory-map the snapshot taken at `version`; None if it is missing or belongs to another database file"""
+    directory = os.path.join(snapshot_dir(db_path), str(version))
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta['version'] != version or meta['file_id'] != _file_id(db_path):
+            return None
+        mmap_mode = 'r' if meta['rows'] else None  # Empty arrays cannot be mapped
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in COLUMNS}
+    except (OSError, ValueError, KeyError):
+        return None
+    return Snapshot(version, **arrays)
+
+
+# --- Column Files ---
+# Writers stream rows into the staging directory chunk by chunk and readers of the
+# previous snapshot read it back the same way, so building a snapshot holds at most
+# a few chunks in memory whatever the size of the project.
+def _write_header(f, name, rows):
+    descr = np.lib.format.dtype_to_descr(np.dtype(ROW_DTYPES[name]))
+    np.lib.format.write_array_header_1_0(f, {'descr': descr, 'fortran_order': False, 'shape': (rows,)})
+
+
+def _create_columns(staging):
+    """Open one .npy file per row column; the headers are rewritten with the row count by _close_columns"""
+    os.makedirs(staging, exist_ok=True)
+    files = {name: open(os.path.join(staging, f"{name}.npy"), "wb") for name in ROW_DTYPES}
+    for name, f in files.items():
+        _write_header(f, name, 0)
+    return files
+
+
+def _append_columns(files, chunk):
+    for name, f in files.items():
+        f.write(np.ascontiguousarray(chunk[name], dtype=ROW_DTYPES[name]).tobytes())
+
+
+def _close_columns(files, rows):
+    for name, f in files.items():
+        f.seek(0)
+        _write_header(f, name, rows)  # Headers are padded to a fixed size, so the data does not move
+        f.close()
+
+
+def _read_columns(directory, chunk_rows):
+    """Yield the snapshot's row columns in chunks of `chunk_rows`, read sequentially from the .npy files"""
+    files = {}
+    try:
+        for name in ROW_DTYPES:
+            f = files[name] = open(os.path.join(directory, f"{name}.npy"), "rb")
+            if np.lib.format.read_magic(f) == (1, 0):
+                np.lib.format.read_array_header_1_0(f)
+            else:
+                np.lib.format.read_array_header_2_0(f)
+        while True:
+            chunk = {name: np.fromfile(f, dtype=ROW_DTYPES[name], count=chunk_rows) for name, f in files.items()}
+            if not len(chunk['codes']):
+                return
+            yield chunk
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def _publish(db_path, version, staging, products, rows):
+    """Move a fully written staging directory into place as the snapshot for `version` and drop older ones"""
+    directory = snapshot_dir(db_path)
+    final = os.path.join(directory, str(version))
+    try:
+        np.save(os.path.join(staging, "products.npy"), products)
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({'version': version, 'file_id': _file_id(db_path), 'rows': rows}, f)
+        if os.path.exists(final):
+            shutil.rmtree(final)  # Same version rewritten (e.g. its writer was interrupted)
+        os.replace(staging, final)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        return None  # Readers keep using SQLite
+
+    # Older versions can never be read again; newer ones belong to a later load
+    for name in os.listdir(directory):
+        if name.isdigit() and int(name) < version:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return version
+
+
+def _staging_dir(db_path, version):
+    return os.path.join(snapshot_dir(db_path), f"{version}.tmp{os.getpid()}")
+
+
+# --- Writers ---
+def write_snapshot(db_path):
+    """
+    Rewrite the project's snapshot from the whole sales table, streamed in chunks.
+    Returns the data version written, or None when snapshots are disabled or could not be written.
+    """
+    if not SNAPSHOTS_ENABLED:
+        return None
+    with db_connection(db_path) as conn, perf.span('snapshot.write', db=db_path) as s:
+        # One read transaction, so the version stamp matches the rows
+        conn.execute("BEGIN")
+        try:
+            version = forecast_cache.get_data_version(conn)
+            counts = pd.read_sql_query('''
+                SELECT product_name, COUNT(*) AS n FROM sales
+                GROUP BY product_name ORDER BY product_name
+            ''', conn)
+            # Product codes follow from the per-product row counts, so no names are read per row
+            ends = np.cumsum(counts['n'].to_numpy(dtype=np.int64))
+            staging = _staging_dir(db_path, version)
+            rows = 0
+            try:
+                files = _create_columns(staging)
+                try:
+                    for chunk in pd.read_sql_query('''
+                        SELECT date, quantity, revenue FROM sales ORDER BY product_name, date
+                    ''', conn, chunksize=CHUNK_ROWS):
+                        _append_columns(files, {
+                            'codes': np.searchsorted(ends, np.arange(rows, rows + len(chunk)), side='right'),
+                            'day': chunk['date'].to_numpy(dtype=np.int64) - JDN_UNIX_EPOCH,
+                            'quantity': chunk['quantity'].to_numpy(dtype=np.float64),
+                            'revenue': chunk['revenue'].to_numpy(dtype=np.float64),
+                        })
+                        rows += len(chunk)
+                finally:
+                    _close_columns(files, rows)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+        finally:
+            conn.commit()
+        s['rows'] = rows
+    return _publish(db_path, version, staging, np.array(counts['product_name'].tolist(), dtype=str), rows)
+
+
+def _keys(codes, day):
+    """(code, day) packed into one int64 that sorts like (product, date), including dates before 1970"""
+    return codes.astype(np.int64) << 32 | (day.astype(np.int64) + DAY_BIAS)
+
+
+def _take(chunk, mask):
+    return {name: values[mask] for name, values in chunk.items()}
+
+
+def _merge_chunks(base_chunks, change_chunks):
+    """
+    Merge two streams of non-empty, key-sorted row chunks (each with a 'key' column)
+    into key-sorted output chunks; a change replaces the base row with the same key.
+    """
+    base, changes = next(base_chunks, None), next(change_chunks, None)
+    while base is not None or changes is not None:
+        # Keys up to the smaller of the two chunks' last keys are final: later chunks only hold larger ones
+        limit = min(chunk['key'][-1] for chunk in (base, changes) if chunk is not None)
+        new = old = None
+        if changes is not None:
+            due = changes['key'] <= limit
+            new, changes = _take(changes, due), _take(changes, ~due)
+        if base is not None:
+            due = base['key'] <= limit
+            old, base = _take(base, due), _take(base, ~due)
+            if new is not None:
+                old = _take(old, ~np.isin(old['key'], new['key']))
+        if new is None:
+            yield old
+        elif old is None:
+            yield new
+        else:
+            at = np.searchsorted(old['key'], new['key'])
+            yield {name: np.insert(old[name], at, new[name]) for name in old}
+        if base is not None and not len(base['key']):
+            base = next(base_chunks, None)
+        if changes is not None and not len(changes['key']):
+            changes = next(change_chunks, None)
+
+
+def merge_snapshot(conn, base_version, version, changed_products, changes_query):
+    """
+    Snapshot for `version` from the one at `base_version` plus a load's new or changed
+    sales rows, without re-reading the table. `changes_query` selects those rows as
+    (product_name, date, quantity, revenue) in (product_name, date) order and
+    `changed_products` lists their distinct names. Both are read in one read
+    transaction on `conn`, after the load committed; if another load has moved the
+    data version on since, nothing is written. Falls back to write_snapshot when the
+    base snapshot is gone. Returns the version or None.
+    """
+    if not SNAPSHOTS_ENABLED:
+        return None
+    db_path = database_path(conn)
+    base = _open(db_path, base_version)
+    if base is None:
+        return write_snapshot(db_path)
+
+    with perf.span('snapshot.merge', db=db_path) as s:
+        conn.execute("BEGIN")
+        try:
+            if forecast_cache.get_data_version(conn) != version:
+                return None
+            products = np.union1d(base.products, np.array(list(changed_products), dtype=str))
+            recode = np.searchsorted(products, base.products).astype(np.int32)
+
+            def base_chunks():
+                for chunk in _read_columns(os.path.join(snapshot_dir(db_path), str(base_version)), CHUNK_ROWS):
+                    chunk['codes'] = recode[chunk['codes']]
+                    chunk['key'] = _keys(chunk['codes'], chunk['day'])
+                    yield chunk
+
+            def change_chunks():
+                for chunk in pd.read_sql_query(changes_query, conn, chunksize=CHUNK_ROWS):
+                    codes = np.searchsorted(products, chunk['product_name'].to_numpy(dtype=str)).astype(np.int32)
+                    day = chunk['date'].to_numpy(dtype=np.int64) - JDN_UNIX_EPOCH
+                    yield {'codes': codes, 'day': day, 'quantity': chunk['quantity'].to_numpy(dtype=np.float64),
+                           'revenue': chunk['revenue'].to_numpy(dtype=np.float64), 'key': _keys(codes, day)}
+
+            staging = _staging_dir(db_path, version)
+            rows = 0
+            try:
+                files = _create_columns(staging)
+                try:
+                    for chunk in _merge_chunks(base_chunks(), change_chunks()):
+                        _append_columns(files, chunk)
+                        rows += len(chunk['key'])
+                finally:
+                    _close_columns(files, rows)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+        finally:
+            conn.commit()
+        s['rows'] = rows
+    return _publish(db_path, version, staging, products, rows)
+
+
+def ensure_snapshot(db_path, version):
+    """Write the snapshot unless one for `version` already exists (projects loaded before snapshots get one too)"""
+    if not SNAPSHOTS_ENABLED:
+        return None
+    return version if has_snapshot(db_path, version) else write_snapshot(db_path)
+
+
+# --- Reader ---
+def load_snapshot(conn):
+    """The project's snapshot for its current data version, memory-mapped read-only; None if there is none"""
+    if not SNAPSHOTS_ENABLED:
+        return None
+    snapshot = _open(database_path(conn), forecast_cache.get_data_version(conn))
+    return snapshot if snapshot is not None and len(snapshot.codes) else None
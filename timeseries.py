@@ -0,0 +1,102 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import cache
+import forecasting
+import perf
+import snapshot
+from db import JDN_UNIX_EPOCH
+
+# --- Dense Sales Matrix ---
+# One (products x days) quantity matrix per project, built in a single ordered
+# read of the daily sales. Every day from the first to the last sale in the
+# project has a column, so gaps are zeros rather than missing rows, and the
+# Dashboard and forecaster slice it instead of regrouping sales frames.
+# `first` / `last` are each product's first and last sale columns.
+SalesMatrix = namedtuple('SalesMatrix', ['products', 'start_day', 'quantity', 'first', 'last'])
+
+
+def read_columns(conn):
+    """
+    (codes, products, day, quantity) of sales in (product, date) order:
+    memory-mapped from the project's snapshot when it is current, otherwise one SQL read.
+    `codes` index the sorted `products`; `day` is days since 1970-01-01.
+    """
+    with perf.span('matrix.read') as s:
+        snap = snapshot.load_snapshot(conn)
+        if snap is not None:
+            s.update(source='snapshot', rows=len(snap.codes))
+            return snap.codes, snap.products.tolist(), snap.day, snap.quantity
+        rows = pd.read_sql_query(
+            "SELECT product_name, date, quantity FROM sales ORDER BY product_name, date", conn)
+        codes, products = pd.factorize(rows['product_name'], sort=True)
+        s.update(source='sqlite', rows=len(rows))
+        return (codes, products, rows['date'].to_numpy(dtype=np.int64) - JDN_UNIX_EPOCH,
+                rows['quantity'].to_numpy(dtype=np.float64))
+
+
+def build_matrix(conn):
+    """Reads sales once into a SalesMatrix (start_day is days since 1970-01-01)"""
+    codes, products, day, values = read_columns(conn)
+    with perf.span('matrix.build') as s:
+        start_day = int(day.min()) if len(day) else 0
+        n_days = int(day.max()) - start_day + 1 if len(day) else 0
+
+        column = day.astype(np.int64) - start_day
+        quantity = np.zeros((len(products), n_days), dtype=np.float64)
+        quantity[codes, column] = values
+        s.update(rows=len(products), bytes=quantity.nbytes)
+
+    # Rows arrive grouped by product in date order, so each group's ends are its first/last sale
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    first = column[np.r_[0, boundaries]] if len(codes) else np.empty(0, dtype=np.int64)
+    last = column[np.r_[boundaries - 1, len(codes) - 1]] if len(codes) else np.empty(0, dtype=np.int64)
+    return SalesMatrix(pd.Index(products, name='product_name'), start_day, quantity, first, last)
+
+
+def load_matrix(conn):
+    """The project's SalesMatrix, rebuilt only when its data version has moved on"""
+    return cache.memoize(conn, 'sales_matrix', build_matrix)
+
+
+# --- Views ---
+def dates(matrix, start=0, stop=None):
+    """Calendar dates of matrix columns start..stop"""
+    stop = matrix.quantity.shape[1] if stop is None else stop
+    return pd.to_datetime(matrix.start_day + np.arange(start, stop), unit='D')
+
+
+def daily_totals(matrix):
+    """Total units sold per day across all products, including days without sales"""
+    return pd.DataFrame({'date': dates(matrix), 'quantity': matrix.quantity.sum(axis=0)})
+
+
+def top_products(matrix, limit=10):
+    """Best selling products by units, returned in ascending order for horizontal bar charts"""
+    totals = matrix.quantity.sum(axis=1)
+    best = np.argsort(-totals, kind='stable')[:limit][::-1]
+    return pd.DataFrame({'product_name': matrix.products[best], 'quantity': totals[best]})
+
+
+def product_series(matrix, product):
+    """Daily (date, quantity) series for one product from its first to its last sale, gaps as 0"""
+    i = matrix.products.get_loc(product)
+    start, stop = matrix.first[i], matrix.last[i] + 1
+    return pd.DataFrame({'date': dates(matrix, start, stop), 'quantity': matrix.quantity[i, start:stop]})
+
+
+def product_history(matrix, products=None):
+    """Forecaster input for the given products (all when None) as a forecasting.DailyHistory"""
+    rows = np.arange(len(matrix.products)) if products is None else matrix.products.get_indexer(products)
+    rows = rows[rows >= 0]
+    first, span = matrix.first[rows], matrix.last[rows] - matrix.first[rows] + 1
+
+    # Left-align every row at its first sale; cells past its last sale are NaN
+    offsets = np.arange(int(span.max()) if len(rows) else 0)[None, :]
+    columns = np.minimum(first[:, None] + offsets, max(matrix.quantity.shape[1] - 1, 0))
+    values = np.take_along_axis(matrix.quantity[rows], columns, axis=1) if len(rows) else \
+        np.empty((0, 0))
+    values[offsets >= span[:, None]] = np.nan
+    return forecasting.DailyHistory(matrix.products[rows], matrix.start_day + first, span, values)
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import re
+import shutil
+import time
+
+import pandas as pd
+
+from db import db_connection
+from forecast_cache import get_data_version
+from ingest import FILE_READERS, IngestValidationError, ingest_file, load_message
+
+# --- Constants ---
+HASH_BLOCK_BYTES = 1 << 20  # Read size when hashing files already on disk
+LEGACY_NAME = re.compile(r"^(\d+)_(.+)$")  # "{timestamp}_{name}" files saved before the manifest
+SKIPPED_PREFIX = "⏭️"  # load_upload messages for content that was already loaded start with this
+
+_synced = set()
+
+
+# --- Content Addressing ---
+# Saved files are named by the SHA-256 of their bytes, so identical content is
+# stored once, and the project's `uploads` table records each file's original name
+# and the outcome of its last load. The Upload page lists the manifest rather
+# than scanning the directory.
+def sha256_file(path):
+    """SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stored_name(sha256, original_name):
+    """Content-addressed file name that keeps the extension the loader dispatches on"""
+    name = original_name.lower()
+    for suffix, _ in FILE_READERS:
+        if name.endswith(suffix):
+            return sha256 + suffix
+    return sha256 + os.path.splitext(name)[1]
+
+
+def save_upload(db_path, upload_dir, original_name, data):
+    """
+    Store uploaded bytes under their content hash and record them in the manifest.
+    Identical content is written once; an earlier upload with the same name but
+    different content is replaced. Returns the SHA-256.
+    """
+    def write(partial_path):
+        with open(partial_path, 'wb') as f:
+            f.write(data)
+
+    return _store(db_path, upload_dir, original_name, hashlib.sha256(data).hexdigest(), len(data), write)
+
+
+def save_upload_file(db_path, upload_dir, original_name, source_path, sha256=None, move=False):
+    """
+    save_upload for a file already on disk, so large files are never held in memory:
+    hashed in blocks (unless `sha256` is given) and copied into place, or moved when
+    `move` is set (the source is then consumed; keep it on the upload directory's
+    filesystem, e.g. a temporary file inside it). Returns the SHA-256.
+    """
+    sha256 = sha256 or sha256_file(source_path)
+
+    def write(partial_path):
+        if move:
+            os.replace(source_path, partial_path)
+        else:
+            shutil.copyfile(source_path, partial_path)
+
+    try:
+        return _store(db_path, upload_dir, original_name, sha256, os.path.getsize(source_path), write)
+    finally:
+        if move and os.path.exists(source_path):
+            os.remove(source_path)  # Identical content was already stored
+
+
+def _store(db_path, upload_dir, original_name, sha256, size, write):
+    """Write the content via write(partial_path) unless it is already stored, then update the manifest"""
+    now = int(time.time())
+
+    with db_connection(db_path) as conn:
+        row = conn.execute("SELECT stored_name FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+        stored_name = row[0] if row else _stored_name(sha256, original_name)
+        file_path = os.path.join(upload_dir, stored_name)
+        if not os.path.exists(file_path):
+            partial_path = file_path + ".part"
+            write(partial_path)
+            os.replace(partial_path, file_path)
+
+        superseded = conn.execute(
+            "SELECT sha256, stored_name FROM uploads WHERE original_name = ? COLLATE NOCASE AND sha256 != ?",
+            (original_name, sha256)).fetchall()
+        conn.executemany("DELETE FROM uploads WHERE sha256 = ?", [(s,) for s, _ in superseded])
+        conn.execute('''
+            INSERT INTO uploads (sha256, original_name, stored_name, size, uploaded_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (sha256) DO UPDATE SET
+                original_name = excluded.original_name,
+                uploaded_at = excluded.uploaded_at
+        ''', (sha256, original_name, stored_name, size, now))
+        conn.commit()
+
+    _remove_files(upload_dir, [name for _, name in superseded])
+    return sha256
+
+
+def list_uploads(db_path):
+    """Manifest of saved files, newest first, indexed by SHA-256"""
+    with db_connection(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT * FROM uploads ORDER BY uploaded_at DESC, original_name", conn, index_col='sha256')
+
+
+def delete_uploads(db_path, upload_dir, hashes):
+    """Remove files and their manifest rows"""
+    with db_connection(db_path) as conn:
+        placeholders = ", ".join("?" * len(hashes))
+        names = [r[0] for r in conn.execute(
+            f"SELECT stored_name FROM uploads WHERE sha256 IN ({placeholders})", list(hashes))]
+        conn.executemany("DELETE FROM uploads WHERE sha256 = ?", [(h,) for h in hashes])
+        conn.commit()
+    _remove_files(upload_dir, names)
+
+
+def _remove_files(upload_dir, names):
+    for name in names:
+        try:
+            os.remove(os.path.join(upload_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+# --- Loading ---
+def is_loaded(entry, data_version, mode="Append"):
+    """
+    True when loading this upload again cannot change the database: its last load
+    committed the current data version, so nothing was written since. Appending is
+    then a no-op; replacing is one only if that last load was a replace as well.
+    """
+    if entry['loaded_version'] is None or entry['loaded_version'] != data_version:
+        return False
+    return mode != "Replace Database" or entry['loaded_mode'] == "Replace Database"
+
+
+def load_upload(db_path, upload_dir, sha256, mode="Append", progress_callback=None):
+    """
+    Loads a saved upload via ingest_file unless is_loaded() says it would be a no-op,
+    then records the outcome in the manifest.
+    Returns: (success_bool, message_string, count_int)
+    """
+    with db_connection(db_path) as conn:
+        row = conn.execute('''
+            SELECT original_name, stored_name, loaded_mode, loaded_version, rows
+            FROM uploads WHERE sha256 = ?
+        ''', (sha256,)).fetchone()
+        data_version = get_data_version(conn)
+    if row is None:
+        return False, "❌ File is no longer in this project.", 0
+    entry = dict(zip(('original_name', 'stored_name', 'loaded_mode', 'loaded_version', 'rows'), row))
+
+    if is_loaded(entry, data_version, mode):
+        return True, (f"{SKIPPED_PREFIX} {entry['original_name']} is already loaded and the data has not changed since "
+                      f"({entry['rows']} records); skipped re-processing."), entry['rows']
+
+    try:
+        stats = ingest_file(os.path.join(upload_dir, entry['stored_name']), db_path, mode=mode,
+                            progress_callback=progress_callback)
+    except IngestValidationError as e:
+        return False, f"❌ {e}", 0
+    except Exception as e:
+        return False, f"Error processing file: {e}", 0
+
+    with db_connection(db_path) as conn:
+        conn.execute('''
+            UPDATE uploads SET loaded_at = ?, loaded_mode = ?, loaded_version = ?,
+                rows = ?, inserted = ?, updated = ?, unchanged = ?
+            WHERE sha256 = ?
+        ''', (int(time.time()), mode, stats['data_version'], stats['rows'], stats['inserted'],
+              stats['updated'], stats['unchanged'], sha256))
+        conn.commit()
+    return True, load_message(stats), stats['rows']
+
+
+# --- Legacy Files ---
+def sync_upload_dir(db_path, upload_dir):
+    """
+    Reconcile the manifest with the upload directory once per process: files saved
+    before the manifest existed ("{timestamp}_{name}") are hashed and registered
+    under their original name, byte-identical copies are removed, and rows whose
+    file has gone missing are dropped.
+    """
+    key = (os.path.abspath(db_path), os.path.abspath(upload_dir))
+    if key in _synced:
+        return
+    on_disk = {f for f in os.listdir(upload_dir)
+               if not f.endswith(".part") and os.path.isfile(os.path.join(upload_dir, f))}
+
+    with db_connection(db_path) as conn:
+        known = dict(conn.execute("SELECT stored_name, sha256 FROM uploads").fetchall())
+        conn.executemany("DELETE FROM uploads WHERE sha256 = ?",
+                         [(sha256,) for name, sha256 in known.items() if name not in on_disk])
+
+        hashes = {sha256 for name, sha256 in known.items() if name in on_disk}
+        duplicates = []
+        for name in sorted(on_disk - set(known)):
+            path = os.path.join(upload_dir, name)
+            sha256 = sha256_file(path)
+            if sha256 in hashes:
+                duplicates.append(name)
+                continue
+            hashes.add(sha256)
+            legacy = LEGACY_NAME.match(name)
+            original_name, uploaded_at = (legacy.group(2), int(legacy.group(1))) if legacy \
+                else (name, int(os.path.getmtime(path)))
+            conn.execute('''
+                INSERT INTO uploads (sha256, original_name, stored_name, size, uploaded_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (sha256, original_name, name, os.path.getsize(path), uploaded_at))
+        conn.commit()
+
+    _remove_files(upload_dir, duplicates)
+    _synced.add(key)
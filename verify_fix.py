@@ -1,59 +1,51 @@
 import os
-import time
+import shutil
+
+from db import init_db
+from uploads import save_upload, list_uploads
 
 # Mock environment
 UPLOAD_DIR = "test_uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+DB_PATH = os.path.join(UPLOAD_DIR, "data.db")
 
 # Clean start
-for f in os.listdir(UPLOAD_DIR):
-    os.remove(os.path.join(UPLOAD_DIR, f))
+if os.path.exists(UPLOAD_DIR):
+    shutil.rmtree(UPLOAD_DIR)
+os.makedirs(UPLOAD_DIR)
+init_db(DB_PATH)
+
+def saved_files():
+    return sorted(f for f in os.listdir(UPLOAD_DIR) if not f.startswith("data.db"))
 
 # Scenario 1: First Upload
 filename = "data.xlsx"
-timestamp1 = int(time.time())
-saved_name1 = f"{timestamp1}_{filename}"
-with open(os.path.join(UPLOAD_DIR, saved_name1), 'w') as f:
-    f.write("content 1")
-print(f"Created initial file: {saved_name1}")
+hash1 = save_upload(DB_PATH, UPLOAD_DIR, filename, b"content 1")
+print(f"Created initial file: {filename} -> {hash1[:12]}")
 
 # Verify it exists
-files = os.listdir(UPLOAD_DIR)
+files = saved_files()
 assert len(files) == 1
-assert saved_name1 in files
+assert files[0].startswith(hash1)
+
+# Scenario 2: Same bytes uploaded again are stored once
+hash_again = save_upload(DB_PATH, UPLOAD_DIR, filename, b"content 1")
+assert hash_again == hash1
+assert saved_files() == files
+print("SUCCESS: Identical content stored once.")
 
-# Scenario 2: Second Upload (Duplicate)
+# Scenario 3: Second Upload (Duplicate name, new content)
 print("Simulating second upload...")
-new_filename = "data.xlsx" # Same name
-# Logic under test
-existing_files = os.listdir(UPLOAD_DIR)
-for existing_file in existing_files:
-    try:
-        parts = existing_file.split('_', 1)
-        if len(parts) > 1:
-            stored_filename = parts[1]
-            if stored_filename == new_filename:
-                print(f"Found duplicate: {existing_file}. Removing...")
-                os.remove(os.path.join(UPLOAD_DIR, existing_file))
-    except Exception:
-        continue
-
-timestamp2 = int(time.time()) + 10 # ensure diff timestamp
-saved_name2 = f"{timestamp2}_{new_filename}"
-with open(os.path.join(UPLOAD_DIR, saved_name2), 'w') as f:
-    f.write("content 2")
+hash2 = save_upload(DB_PATH, UPLOAD_DIR, "DATA.xlsx", b"content 2")
 
 # Verify result
-files = os.listdir(UPLOAD_DIR)
+files = saved_files()
+manifest = list_uploads(DB_PATH)
 print(f"Final files: {files}")
 
 assert len(files) == 1, f"Expected 1 file, found {len(files)}"
-assert saved_name2 in files
-assert saved_name1 not in files
+assert files[0].startswith(hash2)
+assert list(manifest.index) == [hash2]
 print("SUCCESS: Duplicate removed, new file kept.")
 
 # Cleanup
-for f in os.listdir(UPLOAD_DIR):
-    os.remove(os.path.join(UPLOAD_DIR, f))
-os.rmdir(UPLOAD_DIR)
+shutil.rmtree(UPLOAD_DIR)
@@ -0,0 +1,96 @@
+import os
+import shutil
+import sqlite3
+
+from db import SCHEMA_VERSION, db_connection, init_db
+from ingest import process_excel_file
+
+# Mock environment
+TEST_DIR = "test_migrations"
+DB_PATH = os.path.join(TEST_DIR, "data.db")
+CSV_PATH = os.path.join(TEST_DIR, "reimport.csv")
+
+# Clean start
+if os.path.exists(TEST_DIR):
+    shutil.rmtree(TEST_DIR)
+os.makedirs(TEST_DIR)
+
+# Scenario 1: A database as the original app left it: text dates (some with a time
+# suffix), NULL revenue and several rows per product and day, no user_version
+BASELINE_ROWS = [
+    # (id, date, product_name, quantity, revenue)
+    (1, "2024-01-01", "Milk", 10, 25.0),
+    (2, "2024-01-01 00:00:00", "Milk", 5, 12.5),   # Same day as id 1
+    (3, "2024-01-01 18:30:00", "Milk", 1, None),   # Same day again, no revenue
+    (4, "2024-01-02", "Milk", 7, 17.5),
+    (5, "2024-01-01", "Bread", 3, 6.0),
+    (6, "2024-01-02 09:15:00", "Bread", 4, None),  # No revenue at all for this key
+    (7, "2024-01-03", "Eggs", 12, 48.0),
+    (8, "2024-01-03", "Eggs", 6, 24.0),
+]
+conn = sqlite3.connect(DB_PATH)
+conn.execute('''
+    CREATE TABLE sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        product_name TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        revenue REAL
+    )
+''')
+conn.executemany("INSERT INTO sales (id, date, product_name, quantity, revenue) VALUES (?, ?, ?, ?, ?)",
+                 BASELINE_ROWS)
+conn.commit()
+conn.close()
+print(f"Created baseline database with {len(BASELINE_ROWS)} rows")
+
+# Scenario 2: init_db upgrades it in place
+init_db(DB_PATH)
+EXPECTED = {
+    # (product_name, date): (id, quantity, revenue) -- oldest id kept, NULL revenue counted as 0
+    ("Bread", "2024-01-01"): (5, 3, 6.0),
+    ("Bread", "2024-01-02"): (6, 4, 0.0),
+    ("Eggs", "2024-01-03"): (7, 18, 72.0),
+    ("Milk", "2024-01-01"): (1, 16, 37.5),
+    ("Milk", "2024-01-02"): (4, 7, 17.5),
+}
+with db_connection(DB_PATH) as conn:
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    sales = {(p, d): (i, q, r) for i, p, d, q, r in conn.execute(
+        "SELECT id, product_name, date(date), quantity, revenue FROM sales")}
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert conn.execute("SELECT typeof(date) FROM sales GROUP BY 1").fetchall() == [("integer",)]
+print(f"Migrated sales: {sorted(sales.items())}")
+
+assert sales == EXPECTED, sales
+assert "daily_product_sales" not in tables, tables
+assert sum(q for _, q, _ in sales.values()) == sum(row[3] for row in BASELINE_ROWS)
+assert sum(r for _, _, r in sales.values()) == sum(row[4] or 0 for row in BASELINE_ROWS)
+print("SUCCESS: Ids and daily totals preserved, rollup dropped.")
+
+# Scenario 3: Re-importing the original rows changes nothing (one date format per file)
+with open(CSV_PATH, "w") as f:
+    f.write("Date,Product,Quantity,Revenue\n")
+    for _, date, product, quantity, revenue in BASELINE_ROWS:
+        timestamp = date if " " in date else f"{date} 00:00:00"
+        f.write(f"{timestamp},{product},{quantity},{'' if revenue is None else revenue}\n")
+success, message, rows = process_excel_file(CSV_PATH, DB_PATH)
+print(message)
+assert success and rows == len(BASELINE_ROWS)
+assert "(0 new, 0 updated, 5 unchanged)" in message, message
+print("SUCCESS: Re-import reports every key unchanged.")
+
+# Scenario 4: A changed key updates in place, a new key inserts
+with open(CSV_PATH, "w") as f:
+    f.write("Date,Product,Quantity,Revenue\n2024-01-02,Milk,9,22.5\n2024-01-04,Milk,2,5.0\n")
+success, message, rows = process_excel_file(CSV_PATH, DB_PATH)
+print(message)
+assert success and "(1 new, 1 updated, 0 unchanged)" in message, message
+with db_connection(DB_PATH) as conn:
+    assert conn.execute(
+        "SELECT id, quantity FROM sales WHERE product_name = 'Milk' AND date(date) = '2024-01-02'").fetchone() == (4, 9)
+    assert conn.execute("SELECT SUM(quantity) FROM sales").fetchone()[0] == 52
+print("SUCCESS: Upsert keeps ids and daily totals.")
+
+# Cleanup
+shutil.rmtree(TEST_DIR)
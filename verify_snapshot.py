@@ -0,0 +1,121 @@
+import os
+import shutil
+
+import numpy as np
+
+import perf
+import snapshot
+from db import db_connection, init_db
+from forecast_cache import get_data_version
+from ingest import process_excel_file
+
+# Mock environment
+TEST_DIR = "test_snapshot"
+DB_PATH = os.path.join(TEST_DIR, "data.db")
+CSV_PATH = os.path.join(TEST_DIR, "load.csv")
+perf.METRICS_LOG = ""
+snapshot.CHUNK_ROWS = 3  # Tiny chunks, so writes and merges cross many chunk boundaries
+
+# Clean start
+if os.path.exists(TEST_DIR):
+    shutil.rmtree(TEST_DIR)
+os.makedirs(TEST_DIR)
+init_db(DB_PATH)
+
+
+def load(rows, mode="Append"):
+    """Load (date, product, quantity, price) rows; returns the snapshot spans the load opened"""
+    with open(CSV_PATH, "w", encoding="utf-8") as f:
+        f.write("Date,Product,Quantity,Price\n")
+        for date, product, quantity, price in rows:
+            f.write(f'{date},"{product}",{quantity},{price}\n')
+    perf.begin_run()
+    success, message, _ = process_excel_file(CSV_PATH, DB_PATH, mode=mode)
+    spans = [s['name'] for s in perf.end_run() if s['name'].startswith('snapshot.')]
+    assert success, message
+    return spans
+
+
+def current_snapshot():
+    with db_connection(DB_PATH) as conn:
+        version = get_data_version(conn)
+    snap = snapshot._open(DB_PATH, version)
+    assert snap is not None, f"No snapshot for version {version}"
+    return version, {name: np.array(getattr(snap, name)) for name in snapshot.COLUMNS}
+
+
+def check_against_rebuild(label):
+    """The snapshot on disk must equal write_snapshot's full rebuild at the same version"""
+    version, merged = current_snapshot()
+    assert snapshot.write_snapshot(DB_PATH) == version
+    _, rebuilt = current_snapshot()
+    for name in snapshot.COLUMNS:
+        assert np.array_equal(merged[name], rebuilt[name]), f"{label}: column {name} differs"
+    print(f"SUCCESS: {label}: {len(merged['codes'])} rows, {len(merged['products'])} products match a rebuild.")
+
+
+# Scenario 1: First load writes the snapshot in full
+spans = load([
+    ("2024-01-01", "Milk", 10, 2.5),
+    ("2024-01-02", "Milk", 7, 2.5),
+    ("2024-01-01", "Bread", 3, 2.0),
+    ("2024-01-03", "Eggs", 12, 4.0),
+])
+assert spans == ['snapshot.write'], spans
+check_against_rebuild("Initial load")
+
+# Scenario 2: Appends merge into the previous snapshot: new products sorting before,
+# between and after the existing ones, non-ASCII and trailing-space names, updated
+# and new days, and dates before 1970
+spans = load([
+    ("2024-01-02", "Milk", 9, 2.5),      # Updated key
+    ("2024-01-04", "Milk", 1, 2.5),      # New day
+    ("2024-01-01", "Milk ", 4, 2.5),     # Trailing space: a different product
+    ("2024-01-01", "Äpfel", 6, 3.0),     # Sorts after every ASCII name
+    ("2024-01-02", "Café", 2, 5.0),      # Between Bread and Eggs
+    ("2024-01-02", "Applesauce", 5, 1.5),
+    ("1969-12-31", "Bread", 1, 2.0),     # Before 1970: negative day numbers
+    ("1965-06-01", "Bread", 2, 2.0),
+])
+assert spans == ['snapshot.merge'], spans
+check_against_rebuild("Mixed append")
+
+spans = load([
+    ("1969-12-31", "Bread", 8, 2.0),
+    ("2024-01-01", "Äpfel", 6, 3.0),     # Unchanged
+    ("2024-01-05", "Zucchini", 3, 1.0),
+    ("2024-01-01", "Café", 1, 5.0),
+])
+assert spans == ['snapshot.merge'], spans
+check_against_rebuild("Second append")
+
+# Scenario 3: Replace Database rewrites the snapshot; the next append merges again
+spans = load([("2023-12-31", "Tea", 4, 3.0), ("2024-01-01", "Milk ", 2, 2.5)], mode="Replace Database")
+assert spans == ['snapshot.write'], spans
+check_against_rebuild("Replace")
+
+spans = load([("2024-01-01", "Tea", 5, 3.0), ("1970-01-01", "Tea", 1, 3.0), ("2024-01-02", "Milk", 9, 2.5)])
+assert spans == ['snapshot.merge'], spans
+check_against_rebuild("Append after replace")
+
+# Scenario 4: Random appends of new and updated keys across many products and years
+rng = np.random.default_rng(0)
+names = ["SKU-%02d" % i for i in range(30)] + ["Ürün", "Zoë ", " lead"]
+for _ in range(5):
+    days = rng.integers(-40, 40, size=60)  # Often repeats a product-day: updates
+    spans = load([((np.datetime64("1970-01-01") + int(d)).astype(str), rng.choice(names), int(rng.integers(1, 50)), 1.5)
+                  for d in days])
+    assert spans == ['snapshot.merge'], spans
+    check_against_rebuild("Random append")
+
+# Scenario 4: The snapshot holds exactly what SQLite holds
+_, merged = current_snapshot()
+with db_connection(DB_PATH) as conn:
+    expected = conn.execute(
+        "SELECT product_name, date - 2440588, quantity FROM sales ORDER BY product_name, date").fetchall()
+actual = list(zip(merged['products'][merged['codes']].tolist(), merged['day'].tolist(), merged['quantity'].tolist()))
+assert actual == expected, (actual, expected)
+print("SUCCESS: Snapshot rows equal the sales table.")
+
+# Cleanup
+shutil.rmtree(TEST_DIR)
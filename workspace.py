@@ -0,0 +1,84 @@
+import os
+
+from db import init_db
+from uploads import sync_upload_dir
+
+# --- Constants ---
+USERS_DIR = "users"
+DEFAULT_USER = "DefaultUser"
+DEFAULT_PROJECT = "Default Project"  # The user's own data.db / uploaded_files
+
+
+# --- Users ---
+# users/<name>/data.db and uploaded_files/ hold the default project;
+# users/<name>/projects/<project>/ hold data.db and uploads/ for each named project.
+def get_users(users_dir=USERS_DIR):
+    """Get list of existing users"""
+    if not os.path.exists(users_dir):
+        return []
+    return [d for d in os.listdir(users_dir) if os.path.isdir(os.path.join(users_dir, d))]
+
+
+def create_user(username, users_dir=USERS_DIR):
+    """Create a new user workspace with empty structure"""
+    user_dir = os.path.join(users_dir, username)
+    if os.path.exists(user_dir):
+        return False
+
+    # Create user directories
+    os.makedirs(os.path.join(user_dir, "projects"))
+    os.makedirs(os.path.join(user_dir, "uploaded_files"))
+
+    # Initialize empty database
+    init_db(os.path.join(user_dir, "data.db"))
+    return True
+
+
+def init_user_workspace(username, users_dir=USERS_DIR):
+    """Ensure user workspace exists with proper structure"""
+    if not os.path.exists(os.path.join(users_dir, username)):
+        create_user(username, users_dir)
+
+
+# --- Projects ---
+def list_projects(username, users_dir=USERS_DIR):
+    """DEFAULT_PROJECT followed by the user's named projects"""
+    projects_dir = os.path.join(users_dir, username, "projects")
+    projects = [d for d in os.listdir(projects_dir) if os.path.isdir(os.path.join(projects_dir, d))]
+    return [DEFAULT_PROJECT] + projects
+
+
+def project_paths(username, project=DEFAULT_PROJECT, users_dir=USERS_DIR):
+    """(db_path, upload_dir) of a user's project"""
+    user_dir = os.path.join(users_dir, username)
+    if project == DEFAULT_PROJECT:
+        return os.path.join(user_dir, "data.db"), os.path.join(user_dir, "uploaded_files")
+    project_dir = os.path.join(user_dir, "projects", project)
+    return os.path.join(project_dir, "data.db"), os.path.join(project_dir, "uploads")
+
+
+def open_project(username, project=DEFAULT_PROJECT, users_dir=USERS_DIR):
+    """Create the project's upload folder and database if needed; returns (db_path, upload_dir)"""
+    db_path, upload_dir = project_paths(username, project, users_dir)
+    if not os.path.exists(upload_dir):
+        os.makedirs(upload_dir)
+    init_db(db_path)
+    sync_upload_dir(db_path, upload_dir)
+    return db_path, upload_dir
+
+
+def safe_project_name(name):
+    """Project name reduced to letters, digits, spaces, '_' and '-' ('' if nothing is left)"""
+    return "".join([c for c in name if c.isalnum() or c in (' ', '_', '-')]).strip()
+
+
+def create_project(username, name, users_dir=USERS_DIR):
+    """
+    Create (or reuse) a named project for the user.
+    Returns (project_name, db_path, upload_dir); raises ValueError for an unusable name.
+    """
+    project = safe_project_name(name)
+    if not project or project == DEFAULT_PROJECT:
+        raise ValueError("Invalid project name.")
+    db_path, upload_dir = open_project(username, project, users_dir)
+    return project, db_path, upload_dir